@@ -0,0 +1,159 @@
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+import kernels
+from bitslice import sliced, bernoulli_words, lane_mask
+from blocks import count_blocks
+from cache import SequenceCache, save_sequence
+from channel import MemorylessErrors
+from codes import PARITY43, HAMMING74
+from maps import SkewBernoulliMap, LogisticMap, PLM3Map
+from montecarlo import simulate
+
+# Benchmarks of the hot paths
+# a benchmark is setup(N) -> run, where run() does N units of work (map steps, bits or codewords).
+# every (benchmark, N) is run once as warmup and then timed `repeats` times; the best and median
+# times and units per second (of the best run) are saved as JSON. with --baseline the rates are
+# compared to an earlier file and changes beyond the tolerance are reported as speedups or regressions.
+# bench.json is the reference run, committed with the code:
+#   python bench.py --out bench.json
+#   python bench.py --baseline bench.json --only plm3
+
+SIZES = [10**4, 10**5, 10**6]
+REPEATS = 5
+TOLERANCE = 0.1 # relative change of the rate treated as noise
+X0 = 0.51262323
+
+def iterate_bench(m):
+    def setup(n):
+        return lambda: m.iterate(X0, n)
+    return setup
+
+def write_bench(m, t, cached=False): # the write path of entropy.main2 / markov.main2: sequence cache, then the packed file
+    # cached=False times a cache miss (orbit, threshold, cache entry, copy), cached=True a hit (copy only)
+    def setup(n):
+        directory = tempfile.mkdtemp(prefix='bench_cache_')
+        atexit.register(shutil.rmtree, directory, ignore_errors=True)
+        cache = SequenceCache(directory, max_bytes=1 << 40)
+        path = os.path.join(tempfile.gettempdir(), f'bench_{os.getpid()}.bseq')
+        if cached:
+            cache.sequence(m, X0, n, t)
+        def run():
+            if not cached:
+                cache.clear()
+            seq, x = cache.sequence(m, X0, n, t)
+            save_sequence(path, seq, n)
+            os.remove(path)
+        return run
+    return setup
+
+def count_bench(n):
+    bits = np.random.default_rng(0).integers(0, 2, n, dtype=np.uint8)
+    return lambda: count_blocks(bits, 2)
+
+def code_bench(code):
+    def setup(n):
+        info = np.random.default_rng(0).integers(0, 2, (n, code.k), dtype=np.uint8)
+        return lambda: simulate(code, info, MemorylessErrors(0.1), n)
+    return setup
+
+def sliced_bench(code): # bit-sliced kernels alone, errors drawn as sliced words
+    def setup(n):
+        rng = np.random.default_rng(0)
+        words = -(-n // 64)
+        info = rng.integers(0, 2**64, (code.k, words), dtype=np.uint64)
+        errors = bernoulli_words(0.1, (code.n, words), rng)
+        mask = lane_mask(n)
+        return lambda: sliced(code).simulate_words(info, errors, mask)
+    return setup
+
+BENCHMARKS = { # name -> (setup, unit)
+    'bernoulli_iterate': (iterate_bench(SkewBernoulliMap(0.3)), 'steps'),
+    'logistic_iterate': (iterate_bench(LogisticMap()), 'steps'),
+    'plm3_iterate_steep': (iterate_bench(PLM3Map(0.01, 0.1)), 'steps'), # a1 = 10, a2 = 100
+    'plm3_iterate_increasing': (iterate_bench(PLM3Map(0.4, 0.2)), 'steps'), # a > 0
+    'plm3_iterate_decreasing': (iterate_bench(PLM3Map(0.9, 0.3)), 'steps'), # a < 0
+    'bernoulli_write': (write_bench(SkewBernoulliMap(0.3), 0.3), 'bits'),
+    'bernoulli_write_cached': (write_bench(SkewBernoulliMap(0.3), 0.3, cached=True), 'bits'),
+    'plm3_write': (write_bench(PLM3Map(0.4, 0.2), PLM3Map(0.4, 0.2).t), 'bits'),
+    'plm3_write_cached': (write_bench(PLM3Map(0.4, 0.2), PLM3Map(0.4, 0.2).t, cached=True), 'bits'),
+    'transition_count': (count_bench, 'bits'),
+    'parity_check': (code_bench(PARITY43), 'codewords'),
+    'hamming74': (code_bench(HAMMING74), 'codewords'),
+    'parity_check_sliced': (sliced_bench(PARITY43), 'codewords'),
+    'hamming74_sliced': (sliced_bench(HAMMING74), 'codewords'),
+}
+
+def measure(run, repeats=REPEATS, warmup=1): # times of the repeated runs, after warmup
+    for i in range(warmup):
+        run()
+    times = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return times
+
+def run_benchmarks(names=None, sizes=SIZES, repeats=REPEATS, warmup=1):
+    results = {}
+    for name, (setup, unit) in BENCHMARKS.items():
+        if names and not any(part in name for part in names):
+            continue
+        results[name] = {'unit': unit, 'sizes': {}}
+        for n in sizes:
+            times = measure(setup(n), repeats, warmup)
+            best = min(times)
+            results[name]['sizes'][str(n)] = {'best': best, 'median': float(np.median(times)), 'rate': n / best}
+            print(f'{name:26s} N={n:<9d} {n / best:14,.0f} {unit}/s', file=sys.stderr)
+    return {'meta': environment(), 'results': results}
+
+def environment():
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'numba': kernels.ENABLED,
+            'machine': platform.machine(), 'processor': platform.processor(), 'time': time.strftime('%Y-%m-%d %H:%M:%S')}
+
+def compare(current, baseline, tolerance=TOLERANCE): # rows (name, N, baseline rate, rate, speedup, verdict)
+    rows = []
+    for name, result in current['results'].items():
+        old = baseline['results'].get(name, {}).get('sizes', {})
+        for n, entry in result['sizes'].items():
+            if n not in old:
+                continue
+            speedup = entry['rate'] / old[n]['rate']
+            verdict = 'faster' if speedup > 1 + tolerance else 'slower' if speedup < 1 - tolerance else 'same'
+            rows.append((name, int(n), old[n]['rate'], entry['rate'], speedup, verdict))
+    return rows
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description='throughput of the hot paths')
+    p.add_argument('--only', nargs='+', help='benchmarks whose name contains one of these')
+    p.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    p.add_argument('--repeats', type=int, default=REPEATS)
+    p.add_argument('--warmup', type=int, default=1)
+    p.add_argument('--out', help='write the results to this JSON file')
+    p.add_argument('--baseline', help='compare with the results in this JSON file')
+    p.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args = p.parse_args(argv)
+
+    current = run_benchmarks(args.only, args.sizes, args.repeats, args.warmup)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(current, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = 0
+        for name, n, old, new, speedup, verdict in compare(current, baseline, args.tolerance):
+            print(f'{name:26s} N={n:<9d} {old:14,.0f} -> {new:14,.0f}  x{speedup:.2f} {verdict}')
+            regressions += verdict == 'slower'
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import weakref
+import numpy as np
+from exact import popcount
+from instrument import stage
+
+# Bit-sliced simulation of linear block codes: 64 codewords per machine word
+# codeword position j of 64 consecutive codewords is one uint64 word, codeword i in bit i % 64 of
+# word i // 64 (lane). every step of LinearBlockCode.simulate becomes whole-array bitwise ops:
+#   encoding     b_j = XOR of the information words i with G[i, j] = 1
+#   syndrome     s_r = XOR of the received words j with H[r, j] = 1
+#   correction   bit j is flipped in the lanes whose syndrome has a coset leader with bit j set,
+#                an OR over those syndromes of the AND of s_r or ~s_r (a boolean function of s0..s(r-1))
+#   counting     popcount of the error, wrong-bit and wrong-block words
+# the counts are exactly those of LinearBlockCode.simulate (the same coset leaders).
+# error words can also be drawn directly in sliced form with bernoulli_words.
+
+LANES = 64
+ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+def slice_rows(bits): # (m, w) 0/1 rows -> (w, ceil(m/64)) uint64 words, row i in bit i % 64 of word i // 64
+    bits = np.asarray(bits, dtype=np.uint8)
+    m, w = bits.shape
+    words = -(-m // LANES)
+    packed = np.packbits(bits.T, axis=1, bitorder='little') # (w, ceil(m/8)) bytes, row i in bit i % 8
+    out = np.zeros((w, words * 8), dtype=np.uint8)
+    out[:, :packed.shape[1]] = packed
+    return out.view('<u8').astype(np.uint64, copy=False)
+
+def unslice_rows(words, m): # inverse of slice_rows
+    words = np.ascontiguousarray(words, dtype='<u8')
+    return np.unpackbits(words.view(np.uint8), axis=1, bitorder='little')[:, :m].T.copy()
+
+def lane_mask(m): # words with a 1 in the lanes of the m codewords
+    mask = np.full(-(-m // LANES), ONES, dtype=np.uint64)
+    if m % LANES:
+        mask[-1] = np.uint64((1 << (m % LANES)) - 1)
+    return mask
+
+def bernoulli_words(p, shape, rng, precision=32): # words whose bits are independent with P(1) = round(p 2^precision) / 2^precision
+    # bit = [U < p] for a uniform U whose binary digits are random words, compared from the last digit up
+    P = int(round(p * 2 ** precision))
+    if P >= 2 ** precision:
+        return np.full(shape, ONES, dtype=np.uint64)
+    lt = np.zeros(shape, dtype=np.uint64)
+    if P == 0:
+        return lt
+    for i in range((P & -P).bit_length() - 1, precision): # below the lowest 1 digit lt stays 0
+        u = rng.integers(0, 2**64, size=shape, dtype=np.uint64)
+        if P >> i & 1:
+            lt |= u
+        else:
+            lt &= u
+    return lt
+
+class SlicedCode: # a LinearBlockCode on sliced words
+    def __init__(self, code): # keeps no reference to code, so the cache below can drop it
+        self.n, self.k, self.r = code.n, code.k, code.r
+        self.generator = [np.flatnonzero(code.G[:, j]) for j in range(self.n)] # information words of b_j
+        self.checks = [np.flatnonzero(code.H[i]) for i in range(self.r)] # received words of s_i
+        # syndromes (as bit tuples, s0 first) whose coset leader flips bit j
+        self.flips = [[[(s >> (self.r - 1 - i)) & 1 for i in range(self.r)] for s in np.flatnonzero(code.leaders[:, j])]
+                      for j in range(self.n)]
+
+    def encode(self, info): # (k, W) words -> (n, W) words
+        return np.array([np.bitwise_xor.reduce(info[g], axis=0) for g in self.generator])
+
+    def syndrome(self, r): # (n, W) -> (r, W) words, s_i = row i of H times r
+        return np.array([np.bitwise_xor.reduce(r[c], axis=0) for c in self.checks])
+
+    def corrections(self, s): # (n, W) words, 1 where the decoder flips the bit
+        out = np.zeros((self.n,) + s.shape[1:], dtype=np.uint64)
+        match = {} # lanes with syndrome exactly equal to a pattern
+        for j, patterns in enumerate(self.flips):
+            for pattern in patterns:
+                key = tuple(pattern)
+                if key not in match:
+                    m = np.full(s.shape[1:], ONES, dtype=np.uint64)
+                    for i, bit in enumerate(pattern):
+                        m &= s[i] if bit else ~s[i]
+                    match[key] = m
+                out[j] |= match[key]
+        return out
+
+    def simulate_words(self, info, errors, mask): # counters of sliced words, lanes outside mask ignored
+        b = self.encode(info)
+        r = b ^ errors
+        s = self.syndrome(r)
+        d = r ^ self.corrections(s)
+        wrong = (d ^ b) & mask
+        blerr = int(popcount(np.bitwise_or.reduce(wrong, axis=0)).sum())
+        m = int(popcount(mask).sum())
+        return {
+            'ok': m - blerr,
+            'blerr': blerr,
+            'berr0': int(popcount(errors & mask).sum()),
+            'berr': int(popcount(wrong).sum()),
+            'derr': int(popcount(np.bitwise_or.reduce(errors, axis=0) & ~np.bitwise_or.reduce(s, axis=0) & mask).sum()),
+        }
+
+    def simulate(self, info, errors): # same as LinearBlockCode.simulate: (m, k) information and (m, n) error bits
+        m = len(info)
+        with stage('slice', m):
+            info, errors, mask = slice_rows(info), slice_rows(errors), lane_mask(m)
+        with stage('sliced', m):
+            return self.simulate_words(info, errors, mask)
+
+_sliced = weakref.WeakKeyDictionary() # code -> SlicedCode, dropped with the code
+
+def sliced(code): # SlicedCode of a code, built once
+    if code not in _sliced:
+        _sliced[code] = SlicedCode(code)
+    return _sliced[code]
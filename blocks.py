@@ -0,0 +1,126 @@
+import numpy as np
+
+# n-block frequencies
+# every length-n window of a bit sequence is turned into an integer code (first bit = most significant)
+# by n shift/or passes over the whole array, and np.bincount gives the counts of all 2^n blocks at once.
+# joint, marginal and conditional probability tables are derived from those counts.
+
+MAX_N = 25 # longest block: 2^25 int64 counts are 256 MB
+MAX_PACKED_N = 25 # longest block that fits a 32-bit word at any bit offset
+CHUNK = 1 << 24 # bits per chunk when counting packed sequences
+
+def check_block_length(n):
+    if not 1 <= n <= MAX_N:
+        raise ValueError(f'block length must be in 1..{MAX_N}, not {n}')
+
+def block_codes(bits, n): # integer code of every window bits[i:i+n], over the last axis (uint32)
+    check_block_length(n)
+    bits = np.asarray(bits, dtype=np.uint8)
+    m = bits.shape[-1] - n + 1
+    code = np.zeros(bits.shape[:-1] + (max(m, 0),), dtype=np.uint32)
+    if m <= 0:
+        return code
+    for j in range(n):
+        code <<= 1
+        code |= bits[..., j:j + m]
+    return code
+
+def block_labels(n): # '00...0', ..., '11...1' in code order
+    return [format(i, f'0{n}b') for i in range(2 ** n)]
+
+class BlockCounter: # counts[..., code] of all length-n blocks; the last n-1 bits are carried between chunks
+    def __init__(self, n, shape=()):
+        check_block_length(n)
+        self.n = n
+        self.counts = np.zeros(tuple(shape) + (2 ** n,), dtype=np.int64)
+        self.tail = np.zeros(tuple(shape) + (0,), dtype=np.uint8)
+
+    def add(self, bits):
+        bits = np.concatenate((self.tail, np.asarray(bits, dtype=np.uint8)), axis=-1)
+        codes = block_codes(bits, self.n)
+        if codes.shape[-1]:
+            for idx in np.ndindex(self.counts.shape[:-1]):
+                self.counts[idx] += np.bincount(codes[idx], minlength=2 ** self.n)
+        self.tail = bits[..., max(bits.shape[-1] - (self.n - 1), 0):].copy()
+        return self
+
+def packed_block_counts(packed, nstarts, n): # counts of the windows starting at bits 0..nstarts-1 of big-endian packed bytes
+    # a window starting at bit 8k+o lies inside the 32-bit word of bytes k..k+3 when o + n <= 32,
+    # so 8 shift/mask passes over len/8 words replace n passes over len bits
+    if not 1 <= n <= MAX_PACKED_N:
+        raise ValueError(f'block length must be in 1..{MAX_PACKED_N}, not {n}')
+    p = np.zeros(len(packed) + 3, dtype=np.uint32)
+    p[:len(packed)] = packed
+    word = (p[:-3] << 24) | (p[1:-2] << 16) | (p[2:-1] << 8) | p[3:]
+    mask = np.uint32((1 << n) - 1)
+    codes = []
+    for o in range(min(8, nstarts)):
+        k = (nstarts - 1 - o) // 8 + 1 # number of windows starting at bits 8*i + o
+        codes.append((word[:k] >> np.uint32(32 - o - n)) & mask)
+    counts = np.zeros(2 ** n, dtype=np.int64)
+    if n <= 16: # small tables, one bincount per offset avoids the concatenation
+        for c in codes:
+            counts += np.bincount(c, minlength=2 ** n)
+    elif codes:
+        counts += np.bincount(np.concatenate(codes), minlength=2 ** n)
+    return counts
+
+def count_blocks(seq, n, chunk=CHUNK): # counts of a bit array, a seqfile.PackedSequence / TextSequence or a sequence file path
+    check_block_length(n) # before any table is allocated
+    if isinstance(seq, str):
+        from seqfile import open_sequence
+        seq = open_sequence(seq)
+    if hasattr(seq, 'bits') and not hasattr(seq, 'packed'): # text file, packed one chunk (plus the n-1 bits its last windows reach) at a time
+        counts = np.zeros(2 ** n, dtype=np.int64)
+        for start in range(0, len(seq) - n + 1, chunk):
+            nstarts = min(chunk, len(seq) - n + 1 - start)
+            counts += count_blocks(seq.bits(start, start + nstarts + n - 1), n, chunk)
+        return counts
+    if n > MAX_PACKED_N or (hasattr(seq, 'bits') and seq.bitorder != 'big'):
+        counter = BlockCounter(n)
+        if hasattr(seq, 'bits'): # packed, unpack one chunk at a time
+            for start in range(0, len(seq), chunk):
+                counter.add(seq.bits(start, start + chunk))
+        else:
+            counter.add(seq)
+        return counter.counts
+    if hasattr(seq, 'bits'):
+        packed, length = seq.packed, len(seq)
+    else:
+        packed, length = np.packbits(np.asarray(seq, dtype=np.uint8)), len(seq)
+    counts = np.zeros(2 ** n, dtype=np.int64)
+    step = max(chunk // 8, 1)
+    for first in range(0, len(packed), step): # chunk of bytes, plus the 3 bytes its last windows reach into
+        nstarts = min(8 * step, length - n + 1 - 8 * first)
+        if nstarts <= 0:
+            break
+        counts += packed_block_counts(packed[first:first + step + 3], nstarts, n)
+    return counts
+
+def joint_probabilities(counts): # P(x1...xn)
+    counts = np.asarray(counts)
+    return counts / counts.sum(axis=-1, keepdims=True)
+
+def marginal_probabilities(counts): # P(x1...x(n-1)) of the first n-1 symbols of each block
+    counts = np.asarray(counts)
+    pairs = counts.reshape(counts.shape[:-1] + (-1, 2)).sum(axis=-1)
+    return pairs / pairs.sum(axis=-1, keepdims=True)
+
+def conditional_probabilities(counts): # P(xn | x1...x(n-1)), shape (..., 2^(n-1), 2); nan for unseen contexts
+    counts = np.asarray(counts)
+    pairs = counts.reshape(counts.shape[:-1] + (-1, 2))
+    total = pairs.sum(axis=-1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return pairs / total
+
+def order_check(seq, max_order, chunk=CHUNK): # max |P(x|k previous) - P(x|k-1 previous)| for k = 1..max_order
+    # close to 0 from some k on means the sequence behaves like a Markov source of order k-1
+    result = []
+    prev = conditional_probabilities(count_blocks(seq, 1, chunk)) # shape (1, 2)
+    for k in range(1, max_order + 1):
+        cond = conditional_probabilities(count_blocks(seq, k + 1, chunk))
+        # context of cond row r is (x1..xk); dropping x1 gives row r mod 2^(k-1) of prev
+        shorter = prev[np.arange(cond.shape[0]) % prev.shape[0]]
+        result.append(float(np.nanmax(np.abs(cond - shorter))))
+        prev = cond
+    return result
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from maps import SkewBernoulliMap, LogisticMap, PLM3Map
+from seqfile import SequenceWriter, PackedSequence
+from stream import OrbitStream, bit_chunks
+from instrument import count
+
+# On-disk cache of thresholded orbits
+# an entry is keyed by the hash of (map, parameters, threshold, initial value) and holds the packed
+# bits (<key>.bseq, seqfile format) and a <key>.json with the length, the state after the last bit,
+# the states at every chunk boundary and the time of last use.
+# a shorter request is served as a prefix (its final state is iterated from the nearest checkpoint),
+# a longer one continues the orbit from the stored final state. the maps are deterministic float64
+# recurrences, so an extended entry is bit-identical to a fresh run of the full length.
+# entries are returned memory-mapped (seqfile.PackedSequence) and read chunk by chunk, so memory stays O(chunk).
+# when the directory grows beyond max_bytes the least recently used entries are removed.
+
+CACHE_DIR = os.environ.get('SEQ_CACHE', '.seqcache') # default directory
+MAX_BYTES = 1 << 28 # default size cap
+
+def map_key(m): # (name, parameters) of a map object, as in the sequence file headers
+    if isinstance(m, SkewBernoulliMap):
+        return 'skew_bernoulli', {'c': float(m.c)}
+    if isinstance(m, LogisticMap):
+        return 'logistic', {}
+    if isinstance(m, PLM3Map):
+        return 'plm3', {'p1': float(m.p_1), 'p2': float(m.p_2), 't': float(m.t)}
+    raise TypeError(f'cannot cache orbits of {type(m).__name__}')
+
+class SequenceCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, m, iv, t):
+        name, params = map_key(m)
+        ident = json.dumps([name, params, float(t), float(iv)], sort_keys=True) # floats are written with repr, so exactly
+        return hashlib.sha256(ident.encode('utf-8')).hexdigest()[:32]
+
+    def paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + '.bseq', base + '.json'
+
+    def load(self, key): # metadata of an entry, None if missing
+        try:
+            with open(self.paths(key)[1]) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def temp(self): # unique temporary file in the cache directory, so processes filling the same key don't collide
+        fd, path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        os.close(fd)
+        return path
+
+    def save(self, key, meta):
+        tmp = self.temp()
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, self.paths(key)[1])
+
+    def sequence(self, m, iv, n, t): # (PackedSequence whose first n bits are the orbit of iv thresholded at t, state after the n-th point)
+        # the entry may be longer than n; read bits(0, n) or chunks(0, n) of it
+        key = self.key(m, iv, t)
+        seq_path, _ = self.paths(key)
+        meta = self.load(key)
+        if meta is None or not os.path.exists(seq_path):
+            count('cache_miss')
+            meta = self.extend(key, m, iv, t, n, None)
+        elif meta['length'] < n:
+            count('cache_extend')
+            meta = self.extend(key, m, iv, t, n, meta)
+        else:
+            count('cache_hit')
+        meta['used'] = time.time()
+        self.save(key, meta)
+        self.evict(keep=key)
+        return PackedSequence(seq_path), self.state(m, meta, n)
+
+    def extend(self, key, m, iv, t, n, meta): # write an entry of length n, continuing meta if given
+        seq_path, _ = self.paths(key)
+        name, params = map_key(m)
+        start = 0 if meta is None else meta['length']
+        iv = float(iv)
+        x = iv if meta is None else meta['state']
+        checkpoints = [[0, iv]] if meta is None else meta['checkpoints']
+        orbit = OrbitStream(m, x, n - start)
+        tmp = self.temp()
+        with SequenceWriter(tmp, n, map=name, params=dict(params, t=float(t)), iv=iv) as w:
+            if start:
+                old = PackedSequence(seq_path)
+                for bits in old.chunks(0, start):
+                    w.write(bits)
+                del old
+            for b in bit_chunks(orbit, t):
+                w.write(b)
+                checkpoints.append([start + orbit.pos, orbit.state])
+        os.replace(tmp, seq_path)
+        return {'map': name, 'params': params, 't': float(t), 'iv': iv, 'length': n,
+                'state': orbit.state, 'checkpoints': checkpoints}
+
+    def state(self, m, meta, n): # state after n points, from the nearest checkpoint at or before n
+        pos, x = max((c for c in meta['checkpoints'] if c[0] <= n), key=lambda c: c[0])
+        orbit = OrbitStream(m, x, n - pos)
+        for chunk in orbit:
+            pass
+        return orbit.state
+
+    def size(self):
+        return sum(os.path.getsize(os.path.join(self.directory, f)) for f in os.listdir(self.directory))
+
+    def evict(self, keep=None): # remove least recently used entries until the directory fits in max_bytes
+        entries = []
+        for f in os.listdir(self.directory):
+            if f.endswith('.json') and f[:-5] != keep:
+                meta = self.load(f[:-5])
+                entries.append((meta['used'] if meta else 0, f[:-5]))
+        total = self.size()
+        for used, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for path in self.paths(key):
+                if os.path.exists(path):
+                    total -= os.path.getsize(path)
+                    os.remove(path)
+
+    def clear(self):
+        for f in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, f))
+
+def save_sequence(path, seq, n, **header): # first n bits of an entry into a packed file, chunk by chunk (entropy.main2, markov.main2)
+    with SequenceWriter(path, n, **header) as w:
+        for bits in seq.chunks(0, n):
+            w.write(bits)
+
+_default = None
+
+def cached_sequence(m, iv, n, t): # SequenceCache.sequence on the default cache
+    global _default
+    if _default is None:
+        _default = SequenceCache()
+    return _default.sequence(m, iv, n, t)
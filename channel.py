@@ -0,0 +1,105 @@
+from abc import ABC, abstractmethod
+import numpy as np
+from blocks import count_blocks
+from maps import SkewBernoulliMap, PLM3Map
+from trajectory import threshold_grid
+
+# Channel error sources
+# an error model produces error bits (1 = bit flipped) in bulk with bits(n) / packed(n); consecutive
+# calls continue the same error sequence. each model has two backends:
+#   'chaotic' thresholds a chaotic orbit, exactly as hamming.py / hamming1.py always did
+#   'random'  draws the same statistics from numpy's generator; for the Markov model whole runs
+#             of equal bits are drawn (geometric lengths) and expanded with np.repeat,
+#             so the cost grows with the number of runs instead of the number of bits.
+
+BACKENDS = ('chaotic', 'random')
+Z0 = 0.5673244 # initial value of the chaotic error sequence in hamming.py / hamming1.py
+
+class ErrorModel(ABC):
+    def __init__(self, backend, seed):
+        if backend not in BACKENDS:
+            raise ValueError(f'backend must be one of {BACKENDS}, not {backend!r}')
+        self.backend = backend
+        self.rng = np.random.default_rng(seed)
+
+    def bits(self, n): # next n error bits as uint8 0/1
+        if n <= 0:
+            return np.zeros(0, dtype=np.uint8)
+        if self.backend == 'chaotic':
+            seq = self.map.iterate(self.z, n)
+            self.z = self.map.step(float(seq[-1]))
+            return threshold_grid(seq, self.t)
+        return self.random_bits(n)
+
+    def packed(self, n): # next n error bits, packed 8 per byte (big-endian bit order)
+        return np.packbits(self.bits(n))
+
+    @abstractmethod
+    def random_bits(self, n): # next n error bits of the 'random' backend
+        pass
+
+    @abstractmethod
+    def transition_probabilities(self): # theoretical P(1|0), P(0|1)
+        pass
+
+    def stationary(self): # theoretical P(1)
+        p01, p10 = self.transition_probabilities()
+        return p01 / (p01 + p10)
+
+class MemorylessErrors(ErrorModel): # independent errors with probability p
+    def __init__(self, p, backend='chaotic', z0=Z0, seed=None):
+        super().__init__(backend, seed)
+        self.p = p
+        self.t = 1 - p # bit is 1 when the Bernoulli orbit (c = t = 1-p) is above t
+        self.map = SkewBernoulliMap(self.t)
+        self.z = z0
+
+    def random_bits(self, n):
+        return (self.rng.random(n) < self.p).astype(np.uint8)
+
+    def transition_probabilities(self):
+        return self.p, 1 - self.p
+
+class MarkovErrors(ErrorModel): # two-state Markov errors, P(1|0) = p1, P(0|1) = p2
+    def __init__(self, p1, p2, backend='chaotic', t=None, z0=Z0, seed=None):
+        super().__init__(backend, seed)
+        self.p1 = p1
+        self.p2 = p2
+        self.map = PLM3Map(p1, p2, t)
+        self.t = self.map.t
+        self.z = z0
+        self.state = None # last bit of the random backend
+
+    def random_bits(self, n):
+        leave = (self.p1, self.p2) # probability of leaving state 0 / 1
+        if self.state is None: # stationary start, a full run
+            s = int(self.rng.random() < self.stationary())
+            first = self.rng.geometric(leave[s])
+        else: # the current run continues for a geometric number (>= 0) of further bits
+            s = self.state
+            first = self.rng.geometric(leave[s]) - 1
+        lengths = [np.array([first])]
+        states = [np.array([s], dtype=np.uint8)]
+        total = first
+        mean_pair = 1 / self.p1 + 1 / self.p2 # mean length of a 0-run plus a 1-run
+        while total < n:
+            m = int((n - total) / mean_pair * 1.1) + 8 # pairs of runs, a few more than expected
+            nxt = 1 - s # batches hold an even number of runs, so each one starts with the other state
+            run = np.empty(2 * m, dtype=np.int64)
+            run[0::2] = self.rng.geometric(leave[nxt], m)
+            run[1::2] = self.rng.geometric(leave[1 - nxt], m)
+            lengths.append(run)
+            states.append(np.tile(np.array([nxt, 1 - nxt], dtype=np.uint8), m))
+            total += run.sum()
+        e = np.repeat(np.concatenate(states), np.concatenate(lengths))[:n]
+        self.state = int(e[-1])
+        return e
+
+    def transition_probabilities(self):
+        return self.p1, self.p2
+
+def transition_statistics(bits): # empirical P(1), P(1|0), P(0|1) of an error sequence
+    (c00, c01, c10, c11) = count_blocks(bits, 2).tolist()
+    ones = c10 + c11
+    zeros = c00 + c01
+    return (c01 + c11) / (zeros + ones), c01 / zeros, c10 / ones
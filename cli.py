@@ -0,0 +1,231 @@
+import argparse
+import csv
+import json
+import os
+import sys
+
+# Command line entry point: python -m cli <command> [options]
+#   simulate-map      orbit of one map, its bit statistics and optionally a density plot
+#   transition-stats  P(0), P(1), pair and conditional probabilities of a map or a sequence file
+#   parity-check      (4,3) parity check code over memoryless or Markov errors (hamming.py)
+#   hamming74         Hamming (7,4) code over memoryless or Markov errors (hamming1.py)
+#   sequences         packed sequence files for a list of parameters (entropy.main2 / markov.main2)
+# numpy and the computing modules are imported by the command that needs them and matplotlib
+# only when a plot is written, so --help and most runs start fast. every command produces rows
+# that are printed as text, json or csv (--format).
+
+P_LIST = [0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.4, 0.45, 0.49999] # error probabilities of hamming.py / hamming1.py
+
+def make_map(args): # (map object, threshold) from --map and its parameters
+    from maps import SkewBernoulliMap, LogisticMap, PLM3Map
+    if args.map == 'bernoulli':
+        m = SkewBernoulliMap(args.c)
+        t = args.c
+    elif args.map == 'logistic':
+        m = LogisticMap()
+        t = 0.5
+    else:
+        m = PLM3Map(args.p1, args.p2)
+        t = m.t
+    return m, t if args.threshold is None else args.threshold
+
+def map_params(args):
+    if args.map == 'bernoulli':
+        return {'c': args.c}
+    if args.map == 'plm3':
+        return {'p1': args.p1, 'p2': args.p2}
+    return {}
+
+def transition_row(c00, c01, c10, c11): # probabilities of the pair counts
+    total = c00 + c01 + c10 + c11
+    p1 = (c10 + c11) / total
+    p0 = 1 - p1
+    p00, p01, p10, p11 = c00 / total, c01 / total, c10 / total, c11 / total
+    return {'P(0)': p0, 'P(1)': p1, 'P(00)': p00, 'P(01)': p01, 'P(10)': p10, 'P(11)': p11,
+            'P(0|0)': p00 / p0 if p0 else float('nan'), 'P(0|1)': p10 / p1 if p1 else float('nan'),
+            'P(1|0)': p01 / p0 if p0 else float('nan'), 'P(1|1)': p11 / p1 if p1 else float('nan')}
+
+def orbit_pairs(m, x0, n, t): # pair counts of n bits and the bit after them (as in markov.main), sum and final state of the orbit
+    from blocks import BlockCounter
+    from stream import OrbitStream
+    from trajectory import threshold_grid
+    counter = BlockCounter(2)
+    orbit = OrbitStream(m, x0, n)
+    total = 0.0
+    for x in orbit:
+        counter.add(threshold_grid(x, t))
+        total += float(x.sum())
+    counter.add([0 if orbit.state < t else 1])
+    return counter.counts.tolist(), total, orbit.state
+
+def simulate_map(args):
+    m, t = make_map(args)
+    (c00, c01, c10, c11), total, final = orbit_pairs(m, args.x0, args.length, t)
+    row = dict(map=args.map, **map_params(args), x0=args.x0, n=args.length, t=t,
+               mean=total / args.length, **{'P(1)': (c10 + c11) / args.length}, final=final)
+    if args.plot:
+        from density import binned_density
+        from render import figure, render, density_calls
+        density, edges = binned_density(m, bins=args.bins)
+        render(**figure(args.plot, density_calls(edges, density, f'{args.map} invariant density')))
+        row['plot'] = args.plot
+    return [row]
+
+def transition_stats(args):
+    if args.input:
+        from blocks import count_blocks # reads .bseq and .txt files chunk by chunk
+        return [dict(input=args.input, **transition_row(*count_blocks(args.input, 2).tolist()))]
+    from kernels import orbit_pair_counts
+    m, t = make_map(args)
+    counts, final = orbit_pair_counts(m, args.x0, args.length, t)
+    return [dict(map=args.map, **map_params(args), x0=args.x0, n=args.length, t=t, **transition_row(*counts.tolist()))]
+
+def code_rows(script, k, args): # one row per point of script.memoryless_point / script.markov_point
+    from functools import partial
+    from maps import SkewBernoulliMap
+    from montecarlo import exact_bits, source_bits
+    from sweep import grid, run_sweep
+    if args.c is None: # c = t = 0.5 exactly, as hamming.py / hamming1.py
+        info = exact_bits(args.length, k)
+    else:
+        info = source_bits(SkewBernoulliMap(args.c), args.x0, args.c, args.length, k)
+    seed = args.seed if args.backend == 'random' else None
+    if args.p2:
+        points = grid(p=args.p, p2=args.p2)
+        task = script.markov_point
+    else:
+        points = grid(p=args.p)
+        task = script.memoryless_point
+    results = run_sweep(partial(task, info=info, l=args.length, backend=args.backend, rel=args.rel), points, args.workers, seed=seed)
+    return points, results
+
+def interval_columns(rates): # <rate>_low, <rate>_high of every rate of montecarlo.rates
+    columns = {}
+    for name, (estimate, lo, hi) in rates.items():
+        columns[f'{name}_low'], columns[f'{name}_high'] = lo, hi
+    return columns
+
+def parity_check(args):
+    import hamming
+    points, results = code_rows(hamming, 3, args)
+    rows = []
+    for point, result in zip(points, results):
+        row = {'p': point['p']}
+        if args.p2:
+            row['p1'] = result[0]
+            row['p2'] = point['p2']
+            result = result[1:]
+        computed, theoretical, n, rates = result
+        row.update(computed=computed, theoretical=theoretical, codewords=n, **interval_columns(rates))
+        rows.append(row)
+    return rows
+
+def hamming74(args):
+    import hamming1
+    points, results = code_rows(hamming1, 4, args)
+    rows = []
+    for point, result in zip(points, results):
+        row = {'p': point['p']}
+        if args.p2:
+            row['p1'] = result[0]
+            row['p2'] = point['p2']
+            result = result[1:]
+        *values, n, rates = result
+        row.update(zip(('incorrect_computed', 'incorrect_theoretical', 'bit_error_before', 'bit_error_after'), values))
+        row.update(codewords=n, **interval_columns(rates))
+        rows.append(row)
+    return rows
+
+def sequences(args):
+    from maps import SkewBernoulliMap, PLM3Map
+    from seqfile import SequenceWriter
+    from stream import OrbitStream, bit_chunks
+    rows = []
+    x = args.x0
+    for value in args.params:
+        if args.map == 'bernoulli':
+            c = float(value)
+            m, t, name, params = SkewBernoulliMap(c), c, 'skew_bernoulli', {'c': c, 't': c}
+            path = os.path.join(args.out, f'{c}', f'2_{c}.bseq')
+        else:
+            p_1, p_2 = (float(v) for v in value.split(','))
+            m = PLM3Map(p_1, p_2)
+            t, name, params = m.t, 'plm3', {'p1': p_1, 'p2': p_2, 't': m.t}
+            path = os.path.join(args.out, f'p1:{p_1}, p2:{p_2}', f'p1:{p_1}, p2:{p_2}.bseq')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        iv = x # the orbit continues from the previous parameters
+        orbit = OrbitStream(m, x, args.length)
+        with SequenceWriter(path, args.length, map=name, params=params, iv=iv) as w:
+            for b in bit_chunks(orbit, t):
+                w.write(b)
+        x = orbit.state
+        rows.append(dict(path=path, **params, iv=iv, length=w.pos))
+    return rows
+
+def emit(rows, fmt, out=sys.stdout): # print rows as text, json or csv
+    if fmt == 'json':
+        json.dump(rows, out, indent=2)
+        out.write('\n')
+    elif fmt == 'csv':
+        fields = list(dict.fromkeys(key for row in rows for key in row))
+        writer = csv.DictWriter(out, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        for row in rows:
+            out.write(', '.join(f'{key}: {value:.5f}' if isinstance(value, float) else f'{key}: {value}' for key, value in row.items()) + '\n')
+
+def parser():
+    p = argparse.ArgumentParser(prog='python -m cli', description='chaotic maps, binary sources and channel codes')
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--format', choices=('text', 'json', 'csv'), default='text', help='output of the result rows')
+    sub = p.add_subparsers(dest='command', required=True)
+
+    def map_options(s):
+        s.add_argument('--map', choices=('bernoulli', 'logistic', 'plm3'), default='bernoulli')
+        s.add_argument('--c', type=float, default=0.5, help='skew Bernoulli parameter')
+        s.add_argument('--p1', type=float, default=0.4, help='plm3 transition probability 0 -> 1')
+        s.add_argument('--p2', type=float, default=0.2, help='plm3 transition probability 1 -> 0')
+        s.add_argument('--threshold', type=float, default=None, help='default: c, 0.5 or the plm3 t')
+        s.add_argument('--x0', type=float, default=0.51262323)
+        s.add_argument('-n', '--length', type=int, default=1000000)
+
+    s = sub.add_parser('simulate-map', help='orbit statistics of a map', parents=[common])
+    map_options(s)
+    s.add_argument('--plot', metavar='PNG', help='write the invariant density to this file')
+    s.add_argument('--bins', type=int, default=100)
+    s.set_defaults(run=simulate_map)
+
+    s = sub.add_parser('transition-stats', help='pair and conditional probabilities', parents=[common])
+    map_options(s)
+    s.add_argument('--input', metavar='FILE', help='.bseq or .txt sequence instead of a map')
+    s.set_defaults(run=transition_stats)
+
+    for name, run, help in (('parity-check', parity_check, '(4,3) parity check code'), ('hamming74', hamming74, 'Hamming (7,4) code')):
+        s = sub.add_parser(name, help=help, parents=[common])
+        s.add_argument('--p', type=float, nargs='+', default=P_LIST, help='error probabilities')
+        s.add_argument('--p2', type=float, nargs='+', default=None, help='Markov errors with these P(0|1)')
+        s.add_argument('--c', type=float, default=None, help='parameter and threshold of a chaotic information source (default: exactly 0.5, symbolic.py)')
+        s.add_argument('--x0', type=float, default=0.1782612, help='initial value of the chaotic information source')
+        s.add_argument('-n', '--length', type=int, default=1000000, help='number of codewords (the budget with --rel)')
+        s.add_argument('--rel', type=float, default=None, help='stop once the 95%% interval is within rel * estimate')
+        s.add_argument('--backend', choices=('chaotic', 'random'), default='chaotic')
+        s.add_argument('--seed', type=int, default=0)
+        s.add_argument('--workers', type=int, default=None)
+        s.set_defaults(run=run)
+
+    s = sub.add_parser('sequences', help='write packed sequences, the orbit continues across parameters', parents=[common])
+    s.add_argument('--map', choices=('bernoulli', 'plm3'), default='bernoulli')
+    s.add_argument('params', nargs='+', help='c values, or p1,p2 pairs for plm3')
+    s.add_argument('--x0', type=float, default=0.752352)
+    s.add_argument('-n', '--length', type=int, default=1000000)
+    s.add_argument('--out', default='.', help='output directory')
+    s.set_defaults(run=sequences)
+    return p
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    emit(args.run(args), args.format)
+
+if __name__ == '__main__':
+    main()
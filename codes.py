@@ -0,0 +1,161 @@
+import numpy as np
+from itertools import combinations
+from instrument import stage
+
+# Linear block codes on blocks of codewords
+# a code is given by its generator matrix G (k x n) or parity-check matrix H ((n-k) x n) over GF(2).
+# codewords are rows of uint8 arrays. encoding looks up the codeword of every information word,
+# decoding computes the syndrome index of H r mod 2 and adds the coset leader stored for it,
+# so both cost O(1) per codeword whatever the code is.
+
+def gf2_rref(A): # reduced row echelon form over GF(2), returns (R, pivot columns)
+    R = np.array(A, dtype=np.uint8) & 1
+    pivots = []
+    row = 0
+    for col in range(R.shape[1]):
+        hit = np.nonzero(R[row:, col])[0]
+        if len(hit) == 0:
+            continue
+        r = row + hit[0]
+        R[[row, r]] = R[[r, row]]
+        others = np.nonzero(R[:, col])[0]
+        others = others[others != row]
+        R[others] ^= R[row]
+        pivots.append(col)
+        row += 1
+        if row == R.shape[0]:
+            break
+    return R[:row], pivots
+
+def gf2_nullspace(A): # basis (rows) of {x : A x = 0 mod 2}
+    R, pivots = gf2_rref(A)
+    n = R.shape[1]
+    free = [j for j in range(n) if j not in pivots]
+    N = np.zeros((len(free), n), dtype=np.uint8)
+    for i, f in enumerate(free):
+        N[i, f] = 1
+        for r, p in enumerate(pivots):
+            N[i, p] = R[r, f]
+    return N
+
+def gf2_inv(A): # inverse of a square matrix over GF(2)
+    k = A.shape[0]
+    R, pivots = gf2_rref(np.hstack((A, np.eye(k, dtype=np.uint8))))
+    if pivots[:k] != list(range(k)):
+        raise ValueError('matrix is singular over GF(2)')
+    return R[:, k:]
+
+def bits_to_int(bits): # rows of bits -> integers, first bit most significant
+    bits = np.asarray(bits)
+    return bits.astype(np.int64) @ (1 << np.arange(bits.shape[-1] - 1, -1, -1, dtype=np.int64))
+
+def int_to_bits(values, n): # integers -> rows of n bits, first bit most significant
+    values = np.asarray(values, dtype=np.int64)
+    return ((values[..., None] >> np.arange(n - 1, -1, -1)) & 1).astype(np.uint8)
+
+class LinearBlockCode:
+    def __init__(self, G=None, H=None, name=None):
+        if G is None and H is None:
+            raise ValueError('a generator or a parity-check matrix is needed')
+        G = gf2_nullspace(H) if G is None else np.array(G, dtype=np.uint8) & 1
+        H = gf2_nullspace(G) if H is None else np.array(H, dtype=np.uint8) & 1
+        if ((G.astype(np.int64) @ H.T) & 1).any():
+            raise ValueError('G and H are not orthogonal')
+        self.G = G
+        self.H = H
+        self.k, self.n = G.shape
+        self.r = H.shape[0]
+        self.name = name or f'({self.n},{self.k})'
+        if self.n - self.k != self.r or len(gf2_rref(G)[1]) != self.k:
+            raise ValueError('G must have full rank k and H rank n-k')
+        # information set: k columns where G is invertible, so info = c[:, info_set] @ info_inv
+        self.info_set = gf2_rref(G)[1]
+        self.info_inv = gf2_inv(G[:, self.info_set])
+        self.codeword_table = (int_to_bits(np.arange(2 ** self.k), self.k) @ G) & 1 if self.k <= 16 else None
+        self.column_syndromes = bits_to_int(H.T) # syndrome index of each single-bit error
+        self.leaders = self.coset_leaders()
+
+    def coset_leaders(self): # minimum-weight error pattern of every syndrome (first one in lexicographic order)
+        leaders = np.zeros((2 ** self.r, self.n), dtype=np.uint8)
+        found = np.zeros(2 ** self.r, dtype=bool)
+        found[0] = True
+        w = 0
+        while not found.all():
+            w += 1
+            if w > self.n:
+                raise ValueError('H does not have full rank')
+            idx = np.array(list(combinations(range(self.n), w)), dtype=np.int64)
+            s = np.bitwise_xor.reduce(self.column_syndromes[idx], axis=1)
+            s, first = np.unique(s, return_index=True) # first pattern of each syndrome
+            new = ~found[s]
+            s, first = s[new], first[new]
+            leaders[s[:, None], idx[first]] = 1
+            found[s] = True
+        return leaders
+
+    def encode(self, info): # (m, k) information bits -> (m, n) codewords
+        info = np.asarray(info, dtype=np.uint8)
+        if self.codeword_table is not None:
+            return self.codeword_table[bits_to_int(info)]
+        return (info @ self.G) & 1
+
+    def syndrome(self, r): # (m, n) words -> (m,) syndrome index, first row of H most significant
+        return bits_to_int((np.asarray(r, dtype=np.uint8) @ self.H.T) & 1)
+
+    def detect(self, r): # True where an error is detected
+        return self.syndrome(r) != 0
+
+    def decode(self, r): # add the coset leader of the syndrome
+        return r ^ self.leaders[self.syndrome(r)]
+
+    def extract(self, c): # codewords -> information bits
+        return (np.asarray(c, dtype=np.uint8)[:, self.info_set] @ self.info_inv) & 1
+
+    def simulate(self, info, errors): # counters for a block of codewords
+        m = len(info)
+        with stage('encode', m):
+            b = self.encode(info)
+        errors = np.asarray(errors, dtype=np.uint8)
+        r = b ^ errors
+        with stage('decode', m):
+            s = self.syndrome(r)
+            d = r ^ self.leaders[s]
+        with stage('count', m):
+            wrong = (d ^ b).astype(bool)
+            blerr = int(np.count_nonzero(wrong.any(axis=1)))
+            return {
+                'ok': len(b) - blerr, # correct decoding
+                'blerr': blerr, # incorrect decoding
+                'berr0': int(np.count_nonzero(errors)), # error bits before decoding
+                'berr': int(np.count_nonzero(wrong)), # error bits after decoding
+                'derr': int(np.count_nonzero(errors.any(axis=1) & (s == 0))), # undetected errors
+            }
+
+    def __repr__(self):
+        return f'LinearBlockCode({self.name!r}, n={self.n}, k={self.k})'
+
+# (4,3) single parity-check code of hamming.py: b3 = b0 ^ b1 ^ b2
+PARITY43 = LinearBlockCode(G=[[1, 0, 0, 1],
+                              [0, 1, 0, 1],
+                              [0, 0, 1, 1]], name='(4,3) parity check')
+
+# Hamming (7,4) with the bit order of hamming1.py: b4 = b0^b1^b2, b5 = b0^b1^b3, b6 = b0^b2^b3
+G74 = np.array([[1, 0, 0, 0, 1, 1, 1],
+                [0, 1, 0, 0, 1, 1, 0],
+                [0, 0, 1, 0, 1, 0, 1],
+                [0, 0, 0, 1, 0, 1, 1]], dtype=np.uint8)
+H74 = np.array([[1, 1, 1, 0, 1, 0, 0],
+                [1, 1, 0, 1, 0, 1, 0],
+                [1, 0, 1, 1, 0, 0, 1]], dtype=np.uint8) # rows give s0, s1, s2
+HAMMING74 = LinearBlockCode(G74, H74, name='Hamming (7,4)')
+
+# extended Hamming (8,4): (7,4) plus an overall parity bit
+EXTENDED_HAMMING84 = LinearBlockCode(G=np.hstack((G74, G74.sum(axis=1, keepdims=True) & 1)), name='extended Hamming (8,4)')
+
+# Hamming (15,11): systematic, the parity part holds the 11 columns of weight >= 2
+_P1511 = np.array([c for c in int_to_bits(np.arange(1, 16), 4) if c.sum() >= 2], dtype=np.uint8)
+HAMMING1511 = LinearBlockCode(G=np.hstack((np.eye(11, dtype=np.uint8), _P1511)), name='Hamming (15,11)')
+
+# binary Golay (23,12): cyclic code with g(x) = x^11 + x^10 + x^6 + x^5 + x^4 + x^2 + 1
+_g = int_to_bits(0b110001110101, 12)[::-1] # coefficients of x^0 .. x^11
+GOLAY2312 = LinearBlockCode(G=np.array([np.roll(np.concatenate((_g, np.zeros(11, dtype=np.uint8))), i) for i in range(12)]), name='Golay (23,12)')
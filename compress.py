@@ -0,0 +1,390 @@
+import argparse
+import heapq
+import sys
+import time
+import numpy as np
+from blocks import block_codes
+from entropyrate import chunks, reference, source_parameters, block_entropies, conditional_entropies
+from kernels import njit
+
+# Source coding of bit sequences: how close practical codes get to the entropy rate
+# block Huffman   the sequence is cut into blocks of k bits (k = 1..16) and every block is coded with a
+#                 Huffman code chosen by the last `context` bits of the previous block (two passes:
+#                 counts, then coding; the rate includes the code tables, sent as LENGTH_BITS per code length).
+#                 canonical codes; encoding is a lookup of (code, length) per block and decoding peeks
+#                 TABLE_BITS bits into a (symbol, length) table, longer codes continue bit by bit.
+#                 k + context is at most MAX_TABLE, so the tables stay within 2^20 entries per array.
+# arithmetic      binary range coder with 32-bit fixed-point arithmetic (carry handled as in LZMA) and an
+#                 adaptive model: the probability of the next bit given the previous `order` bits is the
+#                 KT estimate (n0 + 1/2) / (n + 1) of the counts seen so far in that context.
+# both stream over the input in chunks and their loops are compiled with numba when it is installed
+# (kernels.py). rates are in code bits per source bit and throughputs in source Mbit/s.
+#   python compress.py assignment3/2/*/*.bseq --blocks 1 4 8 16 --orders 1 8
+
+CHUNK = 1 << 22 # source bits per chunk
+TABLE_BITS = 16 # Huffman decoding table of 2^16 entries per context
+MAX_CODE = 56 # longest Huffman code the 64-bit bit buffers can take
+PROB_BITS = 16 # arithmetic coder probabilities are multiples of 2^-16
+COUNT_LIMIT = 1 << 16 # counts of a context are halved at this total
+LENGTH_BITS = 6 # bits per Huffman code length in the table description
+MAX_TABLE = 20 # k + context at most: the Huffman tables have 2^(k + context) entries (and the decoder 2^(context + its peek bits))
+
+def block_symbols(seq, k, chunk=CHUNK): # k-bit blocks (first bit most significant) of a sequence, chunk by chunk; the last one is padded with 0s
+    rest = np.zeros(0, dtype=np.uint8)
+    for bits in chunks(seq, chunk):
+        bits = np.concatenate((rest, np.asarray(bits, dtype=np.uint8)))
+        m = len(bits) // k * k
+        rest = bits[m:]
+        if m:
+            yield block_codes(bits[:m].reshape(-1, k), k)[:, 0]
+    if len(rest):
+        yield block_codes(np.concatenate((rest, np.zeros(k - len(rest), dtype=np.uint8))).reshape(1, k), k)[:, 0]
+
+def symbol_bits(symbols, k): # inverse of block_symbols
+    return ((symbols[:, None] >> np.arange(k - 1, -1, -1, dtype=np.uint32)) & 1).astype(np.uint8).ravel()
+
+def source_length(seq): # number of bits of an array, a PackedSequence or a sequence file
+    if isinstance(seq, str):
+        from scan import length
+        return length(seq)
+    return len(seq)
+
+def contexts(symbols, previous, mask): # context of every block: the last bits of the block before it
+    return np.concatenate(([previous], symbols[:-1])).astype(np.int64) & mask
+
+def code_lengths(counts): # Huffman code length of every symbol, 0 for the unused ones
+    used = np.flatnonzero(counts)
+    lengths = np.zeros(len(counts), dtype=np.int64)
+    if len(used) <= 1:
+        lengths[used] = 1
+        return lengths
+    heap = [(int(counts[s]), i) for i, s in enumerate(used)]
+    heapq.heapify(heap)
+    parent = [0] * (2 * len(used) - 1)
+    node = len(used)
+    while len(heap) > 1:
+        c1, a = heapq.heappop(heap)
+        c2, b = heapq.heappop(heap)
+        parent[a] = parent[b] = node
+        heapq.heappush(heap, (c1 + c2, node))
+        node += 1
+    depth = [0] * node
+    for i in range(node - 2, -1, -1): # parents have larger numbers than their children
+        depth[i] = depth[parent[i]] + 1
+    lengths[used] = depth[:len(used)]
+    return lengths
+
+class BlockHuffman: # canonical Huffman codes of k-bit blocks, one per context
+    def __init__(self, counts, k, context):
+        counts = np.atleast_2d(counts)
+        self.k, self.context = k, context
+        self.length = np.array([code_lengths(c) for c in counts])
+        self.maxlen = int(self.length.max())
+        if self.maxlen > MAX_CODE:
+            raise ValueError(f'Huffman code of {self.maxlen} bits, at most {MAX_CODE} are supported')
+        self.table_bits = min(self.maxlen, TABLE_BITS, MAX_TABLE - context)
+        size = 2 ** k
+        self.code = np.zeros(counts.shape, dtype=np.int64)
+        self.sorted = np.zeros(counts.shape, dtype=np.int64) # symbols in code order
+        self.first = np.zeros((len(counts), self.maxlen + 2), dtype=np.int64) # first code of every length
+        self.count = np.zeros((len(counts), self.maxlen + 2), dtype=np.int64) # number of codes of every length
+        self.offset = np.zeros((len(counts), self.maxlen + 2), dtype=np.int64) # position of the first one in sorted
+        self.table_symbol = np.zeros((len(counts), 2 ** self.table_bits), dtype=np.int64)
+        self.table_length = np.zeros((len(counts), 2 ** self.table_bits), dtype=np.int64) # 0: longer code
+        for ctx, lengths in enumerate(self.length):
+            order = np.lexsort((np.arange(size), lengths))
+            order = order[lengths[order] > 0]
+            self.sorted[ctx, :len(order)] = order
+            code, prev = 0, 0
+            for i, s in enumerate(order.tolist()):
+                L = int(lengths[s])
+                code <<= L - prev
+                if L != prev:
+                    self.first[ctx, L], self.offset[ctx, L] = code, i
+                self.count[ctx, L] += 1
+                self.code[ctx, s] = code
+                code, prev = code + 1, L
+                if L <= self.table_bits:
+                    shift = self.table_bits - L
+                    self.table_symbol[ctx, self.code[ctx, s] << shift:(self.code[ctx, s] + 1) << shift] = s
+                    self.table_length[ctx, self.code[ctx, s] << shift:(self.code[ctx, s] + 1) << shift] = L
+
+    def mask(self):
+        return (1 << self.context) - 1
+
+    def table_cost(self): # bits to describe the codes (every code length)
+        return self.length.size * LENGTH_BITS
+
+def check_context(k, context): # Huffman tables of at most 2^MAX_TABLE entries
+    if not 0 <= context <= k:
+        raise ValueError(f'context must be in 0..{k}, not {context}')
+    if k + context > MAX_TABLE:
+        raise ValueError(f'blocks of {k} bits with {context} context bits need tables of 2^{k + context} entries, k + context must be at most {MAX_TABLE}')
+
+def symbol_counts(seq, k, context=1, chunk=CHUNK): # counts[context, block]
+    check_context(k, context)
+    counts = np.zeros((2 ** context, 2 ** k), dtype=np.int64)
+    previous, mask = 0, (1 << context) - 1
+    for symbols in block_symbols(seq, k, chunk):
+        pairs = contexts(symbols, previous, mask) * 2 ** k + symbols
+        counts += np.bincount(pairs, minlength=counts.size).reshape(counts.shape)
+        previous = int(symbols[-1])
+    return counts
+
+@njit(cache=True)
+def _huffman_encode(symbols, ctx, code, length, out, pos, acc, nacc): # append the codes to out[pos:]
+    for i in range(len(symbols)):
+        L = length[ctx[i], symbols[i]]
+        acc = (acc << L) | code[ctx[i], symbols[i]]
+        nacc += L
+        while nacc >= 8:
+            nacc -= 8
+            out[pos] = (acc >> nacc) & 0xFF
+            pos += 1
+        acc &= (1 << nacc) - 1
+    return pos, acc, nacc
+
+@njit(cache=True)
+def _huffman_decode(data, bitpos, out, previous, mask, T, table_symbol, table_length, first, count, offset, order, maxlen):
+    # decode len(out) blocks starting at bit bitpos of data (padded with 4 zero bytes); returns (bitpos, previous)
+    for i in range(len(out)):
+        ctx = previous & mask
+        j = bitpos >> 3
+        word = (np.int64(data[j]) << 24) | (np.int64(data[j + 1]) << 16) | (np.int64(data[j + 2]) << 8) | np.int64(data[j + 3])
+        peek = (word >> (32 - (bitpos & 7) - T)) & ((1 << T) - 1)
+        L = table_length[ctx, peek]
+        if L > 0:
+            s = table_symbol[ctx, peek]
+        else: # longer than T bits
+            c = peek
+            L = T
+            s = -1
+            while L < maxlen:
+                b = bitpos + L
+                c = 2 * c + ((data[b >> 3] >> (7 - (b & 7))) & 1)
+                L += 1
+                if c >= first[ctx, L] and c - first[ctx, L] < count[ctx, L]:
+                    s = order[ctx, offset[ctx, L] + c - first[ctx, L]]
+                    break
+            if s < 0:
+                return -1, previous # not a code word
+        out[i] = s
+        bitpos += L
+        previous = s
+    return bitpos, previous
+
+def huffman_encode(seq, k, context=1, chunk=CHUNK): # (model, packed code, code bits, source bits)
+    model = BlockHuffman(symbol_counts(seq, k, context, chunk), k, context)
+    parts, previous, acc, nacc, nbits = [], 0, 0, 0, 0
+    for symbols in block_symbols(seq, k, chunk):
+        ctx = contexts(symbols, previous, model.mask())
+        bits = int(model.length[ctx, symbols].sum())
+        out = np.zeros((bits + nacc) // 8, dtype=np.uint8)
+        pos, acc, nacc = _huffman_encode(symbols.astype(np.int64), ctx, model.code, model.length, out, 0, acc, nacc)
+        parts.append(out[:pos])
+        nbits += bits
+        previous = int(symbols[-1])
+    if nacc:
+        parts.append(np.array([acc << (8 - nacc)], dtype=np.uint8))
+    return model, np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint8), nbits, source_length(seq)
+
+def huffman_decode(model, data, n, chunk=CHUNK): # the source bits, chunk by chunk (n = number of bits)
+    data = np.concatenate((data, np.zeros(4, dtype=np.uint8)))
+    blocks = -(-n // model.k)
+    bitpos, previous, step = 0, 0, max(chunk // model.k, 1)
+    for first in range(0, blocks, step):
+        out = np.zeros(min(step, blocks - first), dtype=np.int64)
+        bitpos, previous = _huffman_decode(data, bitpos, out, previous, model.mask(), model.table_bits,
+                                           model.table_symbol, model.table_length, model.first, model.count,
+                                           model.offset, model.sorted, model.maxlen)
+        if bitpos < 0:
+            raise ValueError('corrupt Huffman code')
+        bits = symbol_bits(out.astype(np.uint32), model.k)
+        yield bits[:n - first * model.k]
+
+@njit(cache=True)
+def _probability(counts, ctx): # P(0 | ctx) * 2^PROB_BITS, KT estimate clipped to (0, 1)
+    p = ((2 * counts[ctx, 0] + 1) << PROB_BITS) // (2 * (counts[ctx, 0] + counts[ctx, 1]) + 2)
+    return min(max(p, 1), (1 << PROB_BITS) - 1)
+
+@njit(cache=True)
+def _update(counts, ctx, b):
+    counts[ctx, b] += 1
+    if counts[ctx, 0] + counts[ctx, 1] >= COUNT_LIMIT:
+        counts[ctx, 0] = (counts[ctx, 0] + 1) >> 1
+        counts[ctx, 1] = (counts[ctx, 1] + 1) >> 1
+
+@njit(cache=True)
+def _arithmetic_encode(bits, counts, mask, state, out): # state = [low, range, cache, cache size, context, position]
+    low, rng, cache, pending, ctx, pos = state[0], state[1], state[2], state[3], state[4], state[5]
+    i = 0
+    while i < len(bits):
+        if pos + pending + 8 > len(out):
+            break # buffer full, the caller grows it and continues at bit i
+        b = bits[i]
+        bound = (rng >> PROB_BITS) * _probability(counts, ctx)
+        if b == 0:
+            rng = bound
+        else:
+            low += bound
+            rng -= bound
+        _update(counts, ctx, b)
+        ctx = ((ctx << 1) | b) & mask
+        while rng < (1 << 24):
+            rng <<= 8
+            if low < 0xFF000000 or low >= (1 << 32): # shift out the top byte, with the carry
+                carry = low >> 32
+                temp = cache
+                while pending > 0:
+                    out[pos] = (temp + carry) & 0xFF
+                    pos += 1
+                    temp = 0xFF
+                    pending -= 1
+                cache = (low >> 24) & 0xFF
+            pending += 1
+            low = (low & 0x00FFFFFF) << 8
+        i += 1
+    state[0], state[1], state[2], state[3], state[4], state[5] = low, rng, cache, pending, ctx, pos
+    return i
+
+@njit(cache=True)
+def _arithmetic_flush(state, out): # the last 5 bytes
+    low, cache, pending, pos = state[0], state[2], state[3], state[5]
+    for k in range(5):
+        if low < 0xFF000000 or low >= (1 << 32):
+            carry = low >> 32
+            temp = cache
+            while pending > 0:
+                out[pos] = (temp + carry) & 0xFF
+                pos += 1
+                temp = 0xFF
+                pending -= 1
+            cache = (low >> 24) & 0xFF
+        pending += 1
+        low = (low & 0x00FFFFFF) << 8
+    return pos
+
+@njit(cache=True)
+def _arithmetic_decode(data, counts, mask, state, out): # state = [code, range, context, position]
+    code, rng, ctx, pos = state[0], state[1], state[2], state[3]
+    for i in range(len(out)):
+        bound = (rng >> PROB_BITS) * _probability(counts, ctx)
+        if code < bound:
+            rng = bound
+            b = 0
+        else:
+            code -= bound
+            rng -= bound
+            b = 1
+        out[i] = b
+        _update(counts, ctx, b)
+        ctx = ((ctx << 1) | b) & mask
+        while rng < (1 << 24):
+            rng <<= 8
+            code = ((code << 8) | data[pos]) & 0xFFFFFFFF
+            pos += 1
+    state[0], state[1], state[2], state[3] = code, rng, ctx, pos
+
+def arithmetic_encode(seq, order=8, chunk=CHUNK): # (packed code, source bits)
+    counts = np.zeros((2 ** order, 2), dtype=np.int64)
+    state = np.array([0, 0xFFFFFFFF, 0, 1, 0, 0], dtype=np.int64)
+    out = np.zeros(1 << 16, dtype=np.uint8)
+    n = 0
+    for bits in chunks(seq, chunk):
+        bits = np.ascontiguousarray(bits, dtype=np.uint8)
+        done = 0
+        while done < len(bits):
+            done += _arithmetic_encode(bits[done:], counts, (1 << order) - 1, state, out)
+            if done < len(bits):
+                out = np.concatenate((out, np.zeros_like(out)))
+        n += len(bits)
+    if len(out) < state[5] + state[3] + 8:
+        out = np.concatenate((out, np.zeros(state[3] + 8, dtype=np.uint8)))
+    return out[:_arithmetic_flush(state, out)].copy(), n
+
+def arithmetic_decode(data, n, order=8, chunk=CHUNK): # the source bits, chunk by chunk
+    data = np.concatenate((data, np.zeros(8, dtype=np.uint8)))
+    counts = np.zeros((2 ** order, 2), dtype=np.int64)
+    code = int.from_bytes(data[1:5].tobytes(), 'big') # the first byte of the code is always 0
+    state = np.array([code, 0xFFFFFFFF, 0, 5], dtype=np.int64)
+    for first in range(0, n, chunk):
+        out = np.zeros(min(chunk, n - first), dtype=np.uint8)
+        _arithmetic_decode(data, counts, (1 << order) - 1, state, out)
+        yield out
+
+def verify(seq, decoded, chunk=CHUNK): # (does the decoded chunk stream reproduce seq, seconds spent decoding)
+    # every decoded chunk is compared with the source as it comes, so only O(chunk) bits are held
+    source = chunks(seq, chunk)
+    rest = np.zeros(0, dtype=np.uint8) # source bits not compared yet
+    ok, seconds = True, 0.0
+    decoded = iter(decoded)
+    while True:
+        start = time.perf_counter()
+        out = next(decoded, None)
+        seconds += time.perf_counter() - start
+        if out is None:
+            break
+        while ok and len(rest) < len(out):
+            bits = next(source, None)
+            if bits is None:
+                break
+            rest = np.concatenate((rest, np.asarray(bits, dtype=np.uint8)))
+        ok = ok and np.array_equal(rest[:len(out)], out)
+        rest = rest[len(out):]
+    return ok and len(rest) == 0 and next(source, None) is None, seconds
+
+def timed(f, *args): # (result, seconds)
+    start = time.perf_counter()
+    result = f(*args)
+    return result, time.perf_counter() - start
+
+def warmup(): # compile the kernels before anything is timed
+    bits = np.arange(64, dtype=np.uint8) % 3 // 2
+    model, data, nbits, n = huffman_encode(bits, 2)
+    list(huffman_decode(model, data, n))
+    data, n = arithmetic_encode(bits, 1)
+    list(arithmetic_decode(data, n, 1))
+
+def evaluate(seq, blocks=(1, 2, 4, 8, 12, 16), orders=(1, 4, 8), context=1, chunk=CHUNK): # one row per code
+    source, params = source_parameters(seq)
+    h = reference(source, params) if source else None
+    estimate = float(conditional_entropies(block_entropies(seq, 12))[-1])
+    warmup()
+    rows = []
+    def row(method, parameter, nbits, n, encode, decode, ok):
+        rate = nbits / n if n else float('nan')
+        return {'method': method, 'parameter': parameter, 'n': n, 'rate': rate, 'entropy': h if h is not None else estimate,
+                'redundancy': rate - (h if h is not None else estimate), 'encode_mbps': n / encode / 1e6,
+                'decode_mbps': n / decode / 1e6, 'ok': ok}
+    for k in blocks:
+        (model, data, nbits, n), encode = timed(huffman_encode, seq, k, min(context, k), chunk)
+        ok, decode = verify(seq, huffman_decode(model, data, n, chunk), chunk)
+        rows.append(row('huffman', k, nbits + model.table_cost(), n, encode, decode, ok))
+    for order in orders:
+        (data, n), encode = timed(arithmetic_encode, seq, order, chunk)
+        ok, decode = verify(seq, arithmetic_decode(data, n, order, chunk), chunk)
+        rows.append(row('arithmetic', order, 8 * len(data), n, encode, decode, ok))
+    return rows
+
+def main(argv=None):
+    from cli import emit
+    p = argparse.ArgumentParser(description='rate of block Huffman and arithmetic coding against the entropy rate')
+    p.add_argument('files', nargs='+', help='.bseq or .txt sequence files')
+    p.add_argument('--blocks', type=int, nargs='+', default=[1, 2, 4, 8, 12, 16], help='Huffman block lengths')
+    p.add_argument('--context', type=int, default=1, help='bits of the previous block that select the Huffman code')
+    p.add_argument('--orders', type=int, nargs='+', default=[1, 4, 8], help='context bits of the arithmetic coder')
+    p.add_argument('--format', choices=('text', 'json', 'csv'), default='text')
+    args = p.parse_args(argv)
+    for k in args.blocks: # before any file is read
+        try:
+            check_context(k, min(args.context, k))
+        except ValueError as e:
+            p.error(str(e))
+    rows = []
+    for path in args.files:
+        rows += [dict(file=path, **r) for r in evaluate(path, args.blocks, args.orders, args.context)]
+    emit(rows, args.format)
+    return 0 if all(r['ok'] for r in rows) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
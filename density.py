@@ -0,0 +1,79 @@
+import numpy as np
+from maps import SkewBernoulliMap, LogisticMap, PLM3Map
+
+# Invariant densities from the Ulam / Perron-Frobenius transfer operator
+# [0, 1] is split into equal bins and P[i, j] = m(B_i and f^-1(B_j)) / m(B_i) is computed exactly
+# from the monotone branches of the map and their inverses (for the piecewise linear maps the image
+# of a bin is an interval, so only bins it touches get an entry). the matrix is kept as sparse
+# (row, col, value) arrays and the stationary density is found by power iteration v <- v P.
+# figures use binned_density: the operator on CELLS cells, added up into the display bins.
+
+CELLS = 10**5 # cells of the transfer operator behind a display histogram
+
+def branches(m): # monotone pieces (left, right, f, inverse of f) of a map object
+    if isinstance(m, SkewBernoulliMap):
+        c = m.c
+        return [(0, c, lambda x: x / c, lambda y: y * c),
+                (c, 1, lambda x: (x - c) / (1 - c), lambda y: c + y * (1 - c))]
+    if isinstance(m, LogisticMap):
+        return [(0, 0.5, m.step_array, lambda y: (1 - np.sqrt(1 - y)) / 2),
+                (0.5, 1, m.step_array, lambda y: (1 + np.sqrt(1 - y)) / 2)]
+    if isinstance(m, PLM3Map):
+        off = m.c1 if m.a_positive else m.c2
+        return [(0, m.c1, lambda x: m.a1 * x, lambda y: y / m.a1),
+                (m.c1, m.c2, lambda x: m.a * (x - off), lambda y: off + y / m.a),
+                (m.c2, 1, lambda x: m.a2 * (x - m.c2), lambda y: m.c2 + y / m.a2)]
+    raise TypeError(f'no branch description for {type(m).__name__}')
+
+def transfer_matrix(m, bins=1000): # sparse Ulam matrix as (rows, cols, values)
+    edges = np.linspace(0, 1, bins + 1)
+    rows, cols, vals = [], [], []
+    for left, right, f, finv in branches(m):
+        i = np.arange(bins)
+        lo = np.maximum(edges[:-1], left) # part of every bin inside the branch
+        hi = np.minimum(edges[1:], right)
+        keep = hi > lo
+        i, lo, hi = i[keep], lo[keep], hi[keep]
+        u, v = np.clip(f(lo), 0, 1), np.clip(f(hi), 0, 1)
+        u, v = np.minimum(u, v), np.maximum(u, v) # image interval of the piece
+        j0 = np.minimum((u * bins).astype(np.int64), bins - 1)
+        j1 = np.minimum(np.ceil(v * bins).astype(np.int64), bins)
+        count = np.maximum(j1 - j0, 1) # target bins touched by each piece
+        src = np.repeat(np.arange(len(i)), count)
+        j = np.repeat(j0, count) + (np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count))
+        ylo = np.maximum(u[src], edges[j])
+        yhi = np.minimum(v[src], edges[j + 1])
+        ok = yhi > ylo
+        src, j, ylo, yhi = src[ok], j[ok], ylo[ok], yhi[ok]
+        mass = np.abs(finv(yhi) - finv(ylo)) / (edges[i[src] + 1] - edges[i[src]])
+        rows.append(i[src]); cols.append(j); vals.append(mass)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(vals), edges
+
+def stationary(rows, cols, vals, bins, tol=1e-12, max_iter=100000): # probability vector with v P = v
+    v = np.full(bins, 1 / bins)
+    for it in range(max_iter):
+        w = np.bincount(cols, weights=vals * v[rows], minlength=bins)
+        w /= w.sum()
+        if np.abs(w - v).sum() < tol:
+            return w, it + 1
+        v = w
+    return v, max_iter
+
+def invariant_density(m, bins=1000, tol=1e-12, max_iter=100000): # density on the bins and the bin edges
+    rows, cols, vals, edges = transfer_matrix(m, bins)
+    v = stationary(rows, cols, vals, bins, tol, max_iter)[0]
+    return v / np.diff(edges), edges
+
+def binned_density(m, bins=100, cells=CELLS): # invariant density on `bins` display bins, computed on a fine partition and added up
+    # Ulam's method converges slowly for a smooth map (100 cells flatten the logistic arcsine density at the
+    # edges), so the operator is solved on `cells` cells (rounded to a multiple of bins) and the mass summed
+    fine = max(cells // bins, 1)
+    density, edges = invariant_density(m, bins * fine)
+    mass = (density * np.diff(edges)).reshape(bins, fine).sum(axis=1)
+    edges = np.linspace(0, 1, bins + 1)
+    return mass / np.diff(edges), edges
+
+def discrepancy(density, edges, x): # L1 distance between the operator density and the histogram of samples x
+    counts = np.histogram(x, bins=edges)[0]
+    empirical = counts / (counts.sum() * np.diff(edges))
+    return float(np.sum(np.abs(empirical - density) * np.diff(edges)))
@@ -1,6 +1,12 @@
 import numpy as np
-import matplotlib.pyplot as plt
 import os
+from maps import SkewBernoulliMap
+from blocks import BlockCounter
+from cache import cached_sequence, save_sequence
+from stream import bernouli_stream
+from sweep import grid, run_sweep
+from trajectory import threshold_grid
+from instrument import point, stage
 
 # Variables
 c_params = [0.3, 0.4] # parameter c
@@ -9,32 +15,28 @@ ivs = [0.752352] # initial values
 l = 1000000 # length (N)
 n = 60 # iteration
 
-def skew_bernouli_map(x, c): # Bernoulli function
-    if x < c:
-        return (x/c)
-    else:
-        return (x-c)/(1-c)
+def transition_counts(c): # pair counts [idx, j, b1 b2] for one c, every initial value and t
+    # every t continues the orbit where the previous t stopped, so each (c, initial value)
+    # orbit has len(t_params) * l + 1 points; t_params[j] counts the pairs of points j*l .. (j+1)*l
+    counters = [BlockCounter(2, shape=(len(ivs),)) for t in t_params]
+    orbit = bernouli_stream(ivs, [c], len(t_params) * l + 1)
+    for x in orbit:
+        x = x[0]
+        start = orbit.pos - x.shape[-1] # time index of x[..., 0]
+        for j, t in enumerate(t_params):
+            lo = max(start, j * l); hi = min(orbit.pos, (j + 1) * l + 1)
+            if lo < hi:
+                with stage('count', (hi - lo) * len(ivs)):
+                    counters[j].add(threshold_grid(x[..., lo - start:hi - start], t))
+    return np.stack([counter.counts for counter in counters], axis=1)
 
-def treshold_function(x, t): # threshold (make it binary (1 or 0))
-    if x < t:
-        return 0
-    else:
-        return 1
-
-def main():
-    for c in c_params:
-        for x in ivs:
-            for t in t_params:
-                c1 = c00 = c01 = c10 = c11 = 0 # initialization of counters
-                for i in range (l):
-                    b1 = treshold_function(x, t)
-                    b2 = treshold_function(skew_bernouli_map(x, c), t)
-                    c1 += b1 # number of 1
-                    c11 += b1 * b2
-                    c10 += b1 * (1 - b2)
-                    c01 += (1 - b1) * b2
-                    c00 += (1 - b1) * (1 - b2) 
-                    x = skew_bernouli_map(x, c) # next mapping
+def main(workers=None):
+    counts = run_sweep(transition_counts, grid(c=c_params), workers) # one c per worker
+    for k, c in enumerate(c_params):
+        for idx, iv in enumerate(ivs):
+            for j, t in enumerate(t_params):
+                (c00, c01), (c10, c11) = counts[k][idx, j].reshape(2, 2).tolist()
+                c1 = c10 + c11 # number of 1
 
                 # calculate P
                 p1 = c1 / l
@@ -66,18 +68,16 @@ def main2():
     x = ivs[0]
 
     for c in c_list:
-        b_seq = ""
-        for i in range (l):
-            b1 = treshold_function(x, c)
-            b_seq += str(b1)
-            x = skew_bernouli_map(x, c)
-
-        print(f"c:{c}", b_seq[:10])
-        print("length", len(b_seq))
-        # save
-        os.makedirs('assignment2/{}'.format(c), exist_ok=True)
-        with open(f'assignment2/{c}/2_{c}.txt', 'w') as f:
-            f.write(b_seq)
+        with point(c=c):
+            iv = x # the orbit continues from the previous c
+            with stage('sequence', l):
+                seq, x = cached_sequence(SkewBernoulliMap(c), iv, l, c) # from the sequence cache (cache.py) after the first run
+            print(f"c:{c}", ''.join(map(str, seq.bits(0, 10))))
+            # save (bit-packed, see seqfile.py; old .txt results can be converted with txt_to_packed)
+            os.makedirs('assignment2/{}'.format(c), exist_ok=True)
+            with stage('write', l):
+                save_sequence(f'assignment2/{c}/2_{c}.bseq', seq, l, map='skew_bernoulli', params={'c': c, 't': c}, iv=iv)
+            print("length", l)
 
 
 if __name__ == "__main__": 
@@ -0,0 +1,192 @@
+import sys
+import numpy as np
+from blocks import count_blocks
+from kernels import njit
+
+# Entropy and entropy-rate estimators of bit sequences
+# block entropies H(X1..Xn) for n = 1..max_n come from one pass of blocks.count_blocks at max_n
+# (shorter blocks are marginals), and the conditional entropies H(Xn | X1..X(n-1)) are their differences.
+# Lempel-Ziv estimates:
+#   LZ78  incremental parsing into new phrases, a binary trie of the phrases in flat arrays;
+#         c phrases of n bits give h ~ c log2(c) / n. the parse continues across chunks.
+#   LZ76  Lempel-Ziv complexity (Kaspar-Schuster phrases: the shortest piece not seen before in the
+#         text so far), found online in O(n) with a suffix automaton; h ~ c log2(n) / n.
+#         the automaton needs ~2n states, so long sequences are split into windows and averaged.
+# sequences are arrays, seqfile.PackedSequence / TextSequence objects or file paths (both formats
+# memory-mapped), read chunk by chunk.
+# the parsing loops are compiled with numba when it is installed (kernels.py).
+
+CHUNK = 1 << 24 # bits unpacked at a time
+WINDOW = 1 << 22 # bits per LZ76 window
+
+def chunks(seq, chunk=CHUNK): # bit arrays of at most chunk bits
+    if isinstance(seq, str):
+        from seqfile import open_sequence
+        seq = open_sequence(seq)
+    if hasattr(seq, 'bits'):
+        for start in range(0, len(seq), chunk):
+            yield seq.bits(start, min(start + chunk, len(seq)))
+    else:
+        seq = np.asarray(seq, dtype=np.uint8)
+        for start in range(0, len(seq), chunk):
+            yield seq[start:start + chunk]
+
+def shannon(p): # entropy in bits of the probabilities p (last axis)
+    p = np.asarray(p, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return -np.sum(np.where(p > 0, p * np.log2(p), 0), axis=-1)
+
+def binary_entropy(p):
+    return float(shannon([p, 1 - p]))
+
+def block_entropies(seq, max_n=16): # H(X1..Xn) for n = 1..max_n
+    counts = count_blocks(seq, max_n).astype(np.float64)
+    result = []
+    for n in range(1, max_n + 1):
+        c = counts.reshape(2 ** n, -1).sum(axis=1) # blocks of n bits (the starts of the max_n blocks)
+        result.append(shannon(c / c.sum()))
+    return np.array(result)
+
+def conditional_entropies(H): # H(Xn | X1..X(n-1)) for n = 1..len(H), the first one is H(X1)
+    H = np.asarray(H)
+    return np.concatenate((H[:1], np.diff(H)))
+
+@njit(cache=True)
+def _lz78(bits, child, node, nodes, phrases): # continue the parse; returns (node, nodes, phrases, bits used)
+    for i in range(len(bits)):
+        nxt = child[2 * node + bits[i]]
+        if nxt != 0:
+            node = nxt
+        else:
+            if 2 * nodes + 1 >= len(child):
+                return node, nodes, phrases, i # trie full, the caller grows it and calls again
+            child[2 * node + bits[i]] = nodes
+            nodes += 1
+            phrases += 1
+            node = 0
+    return node, nodes, phrases, len(bits)
+
+def lz78(seq, chunk=CHUNK): # (phrases, bits, entropy-rate estimate)
+    child = np.zeros(1 << 16, dtype=np.int64) # child[2 node + bit], 0 = none (the root is never a child)
+    node, nodes, phrases, n = 0, 1, 0, 0
+    for bits in chunks(seq, chunk):
+        bits = np.ascontiguousarray(bits, dtype=np.uint8)
+        pos = 0
+        while pos < len(bits):
+            node, nodes, phrases, used = _lz78(bits[pos:], child, node, nodes, phrases)
+            pos += used
+            if pos < len(bits):
+                child = np.concatenate((child, np.zeros_like(child)))
+        n += len(bits)
+    if node != 0: # unfinished last phrase
+        phrases += 1
+    return phrases, n, float(phrases * np.log2(max(phrases, 2)) / n) if n else 0.0
+
+@njit(cache=True)
+def _lz76(bits): # Lempel-Ziv (1976) complexity of bits with an online suffix automaton
+    n = len(bits)
+    size = 2 * n + 2
+    nxt = np.full((size, 2), -1, dtype=np.int64)
+    link = np.full(size, -1, dtype=np.int64)
+    length = np.zeros(size, dtype=np.int64)
+    states = 1
+    last = 0
+    v = 0 # state reached by reading the current phrase
+    m = 0 # length of the current phrase
+    c = 0
+    for j in range(n):
+        b = bits[j]
+        # does phrase + b occur in bits[:j]?
+        if nxt[v, b] != -1:
+            v = nxt[v, b]
+            m += 1
+        else:
+            c += 1
+            v = 0
+            m = 0
+        # add bits[j] to the automaton
+        cur = states
+        states += 1
+        length[cur] = length[last] + 1
+        p = last
+        while p != -1 and nxt[p, b] == -1:
+            nxt[p, b] = cur
+            p = link[p]
+        if p == -1:
+            link[cur] = 0
+        else:
+            q = nxt[p, b]
+            if length[p] + 1 == length[q]:
+                link[cur] = q
+            else:
+                clone = states
+                states += 1
+                length[clone] = length[p] + 1
+                nxt[clone, 0] = nxt[q, 0]
+                nxt[clone, 1] = nxt[q, 1]
+                link[clone] = link[q]
+                while p != -1 and nxt[p, b] == q:
+                    nxt[p, b] = clone
+                    p = link[p]
+                link[q] = clone
+                link[cur] = clone
+                if v == q and m <= length[clone]: # the phrase now reads to the clone
+                    v = clone
+        last = cur
+    if m > 0: # unfinished last phrase
+        c += 1
+    return c
+
+def lz76(seq, window=WINDOW): # (mean complexity per window, windows, entropy-rate estimate)
+    rates, complexities = [], []
+    for bits in chunks(seq, window):
+        if len(bits) < 2:
+            continue
+        c = _lz76(np.ascontiguousarray(bits, dtype=np.uint8))
+        complexities.append(c)
+        rates.append(c * np.log2(len(bits)) / len(bits))
+    if not rates:
+        return 0.0, 0, 0.0
+    return float(np.mean(complexities)), len(rates), float(np.mean(rates))
+
+def reference(map, params): # theoretical entropy rate (bits per symbol) of the thresholded sources, None if unknown
+    if map == 'skew_bernoulli' and params.get('t', params.get('c')) == params.get('c'):
+        return binary_entropy(params['c']) # threshold at c: independent bits with P(1) = 1-c
+    if map == 'b_adic': # symbolic.py for c != 1/2: independent bits with P(0) = c
+        return binary_entropy(params['c'])
+    if map == 'plm3' and 'p1' in params:
+        p1, p2 = params['p1'], params['p2']
+        pi1 = p1 / (p1 + p2) # Markov chain P(1|0) = p1, P(0|1) = p2
+        return (1 - pi1) * binary_entropy(p1) + pi1 * binary_entropy(p2)
+    return None
+
+def source_parameters(seq): # (map, params) of a sequence file, from its header or its directory names
+    if not isinstance(seq, str):
+        return None, {}
+    from scan import parameters
+    if seq.endswith('.bseq'):
+        from seqfile import read_header
+        header = read_header(seq)[0]
+        if header.get('map'):
+            return header['map'], header.get('params') or {}
+    return parameters(seq)
+
+def estimate(seq, max_n=16, window=WINDOW): # all estimates of a sequence (and the reference value of its source, if known)
+    H = block_entropies(seq, max_n)
+    h = conditional_entropies(H)
+    phrases, n, lz78_rate = lz78(seq)
+    complexity, windows, lz76_rate = lz76(seq, window)
+    result = {'n': n, 'H1': float(H[0]), 'block': H.tolist(), 'conditional': h.tolist(), 'block_rate': float(h[-1]),
+              'lz78_phrases': phrases, 'lz78_rate': lz78_rate,
+              'lz76_complexity': complexity, 'lz76_windows': windows, 'lz76_rate': lz76_rate, 'reference': None}
+    map, params = source_parameters(seq)
+    if map:
+        result['reference'] = reference(map, params)
+    return result
+
+if __name__ == '__main__': # python entropyrate.py <file.bseq | file.txt> ...
+    for path in sys.argv[1:]:
+        r = estimate(path)
+        ref = 'unknown' if r['reference'] is None else f'{r["reference"]:.5f}'
+        print(f'{path}: n = {r["n"]}, H(X) = {r["H1"]:.5f}, block rate = {r["block_rate"]:.5f}, '
+              f'LZ78 = {r["lz78_rate"]:.5f}, LZ76 = {r["lz76_rate"]:.5f}, reference = {ref}')
@@ -0,0 +1,63 @@
+import numpy as np
+
+# Exact error probabilities of a linear block code (codes.py) over an error model (channel.py)
+# all 2^n error patterns are enumerated as integers (first codeword bit most significant).
+# the probability of a pattern under a stationary two-state Markov source is the transfer-matrix
+# product P(e0) * P(e1|e0) * ... * P(e(n-1)|e(n-2)), evaluated for every pattern at once from its
+# numbers of 00, 01, 10 and 11 transitions; a memoryless source is the case P(1|0) = P(1|1) = p.
+
+CHUNK = 1 << 20 # patterns per block
+
+def popcount(v): # number of set bits of every element of an integer array
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(v).astype(np.int64)
+    v = np.asarray(v, dtype=np.uint64)
+    table = np.array([bin(i).count('1') for i in range(256)], dtype=np.int64)
+    count = np.zeros(v.shape, dtype=np.int64)
+    for shift in range(0, 64, 8):
+        count += table[(v >> np.uint64(shift)) & np.uint64(0xFF)]
+    return count
+
+def pattern_probabilities(v, n, p01, p10): # probability of the n-bit patterns v under the stationary Markov source
+    p1 = p01 / (p01 + p10) # stationary P(1)
+    first = (v >> (n - 1)) & 1
+    m = (1 << (n - 1)) - 1
+    prev = (v >> 1) & m # e0 .. e(n-2)
+    nxt = v & m # e1 .. e(n-1), aligned with prev
+    c11 = popcount(prev & nxt)
+    c10 = popcount(prev & ~nxt & m)
+    c01 = popcount(~prev & nxt & m)
+    c00 = (n - 1) - c11 - c10 - c01
+    start = np.where(first == 1, p1, 1 - p1)
+    return start * (1 - p01) ** c00 * p01 ** c01 * p10 ** c10 * (1 - p10) ** c11
+
+def syndrome_tables(code): # per byte of the pattern integer: syndrome index of each of its 256 values
+    tables = []
+    for shift in range(0, code.n, 8):
+        cols = [code.column_syndromes[code.n - 1 - (shift + b)] if shift + b < code.n else 0 for b in range(8)]
+        t = np.zeros(256, dtype=np.int64)
+        for value in range(256):
+            for b in range(8):
+                if value >> b & 1:
+                    t[value] ^= cols[b]
+        tables.append((shift, t))
+    return tables
+
+def exact_probabilities(code, model, chunk=CHUNK): # exact undetected-error, block-error and bit-error probabilities
+    n = code.n
+    p01, p10 = model.transition_probabilities()
+    leaders = code.leaders.astype(np.int64) @ (1 << np.arange(n - 1, -1, -1, dtype=np.int64)) # coset leaders as integers
+    tables = syndrome_tables(code)
+    total = dict.fromkeys(('undetected', 'block', 'bit_before', 'bit_after'), 0.0)
+    for start in range(0, 1 << n, chunk):
+        v = np.arange(start, min(start + chunk, 1 << n), dtype=np.int64)
+        prob = pattern_probabilities(v, n, p01, p10)
+        s = np.zeros(len(v), dtype=np.int64)
+        for shift, t in tables:
+            s ^= t[(v >> shift) & 0xFF]
+        residual = v ^ leaders[s] # error pattern left after decoding
+        total['undetected'] += prob[(v != 0) & (s == 0)].sum()
+        total['block'] += prob[residual != 0].sum()
+        total['bit_before'] += (prob * popcount(v)).sum() / n
+        total['bit_after'] += (prob * popcount(residual)).sum() / n
+    return {key: float(value) for key, value in total.items()}
@@ -0,0 +1,124 @@
+import atexit
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+# Opt-in instrumentation: stage timers, counters and memory per parameter point
+# enabled with the environment variable PROFILE (PROFILE=1 prints the report to stderr at exit,
+# PROFILE=<file>.json writes it as JSON); being an environment variable it reaches the sweep workers too.
+# when disabled stage() returns one shared no-op context and count() returns at once, so the
+# instrumented loops (which call them once per chunk, not per step) cost nothing measurable.
+# sweep.run_sweep opens a point() for every parameter point and brings the records back from the workers.
+
+PROFILE = os.environ.get('PROFILE', '')
+ENABLED = bool(PROFILE) and PROFILE != '0'
+
+_NULL = nullcontext()
+_records = [] # finished points
+_stack = [] # records being filled, innermost last
+
+def _new_record(params):
+    return {'point': params, 'stages': {}, 'counters': {}, 'wall': 0.0, 'peak_rss_mb': None}
+
+def _record(): # record of the innermost open point, or of the whole run outside any point
+    if not _stack:
+        _stack.append(_new_record({'run': os.path.basename(sys.argv[0]) or 'python'}))
+        _stack[0]['start'] = time.perf_counter()
+    return _stack[-1]
+
+class _Stage:
+    __slots__ = ('stages', 'name', 'items', 'start')
+
+    def __init__(self, stages, name, items):
+        self.stages = stages
+        self.name = name
+        self.items = items
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        s = self.stages.get(self.name)
+        if s is None:
+            s = self.stages[self.name] = {'time': 0.0, 'calls': 0, 'items': 0}
+        s['time'] += time.perf_counter() - self.start
+        s['calls'] += 1
+        s['items'] += self.items
+        return False
+
+def stage(name, items=0): # time a block of work on items items (codewords, bits, steps)
+    if not ENABLED:
+        return _NULL
+    return _Stage(_record()['stages'], name, items)
+
+def count(name, n=1): # add n to a counter of the current point
+    if ENABLED:
+        counters = _record()['counters']
+        counters[name] = counters.get(name, 0) + n
+
+def peak_rss_mb(): # peak resident memory of this process
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform != 'darwin' else peak / 2**20
+
+@contextmanager
+def point(**params): # everything measured inside belongs to this parameter point
+    if not ENABLED:
+        yield
+        return
+    scalars = {k: v for k, v in params.items() if isinstance(v, (bool, int, float, str))}
+    record = _new_record(scalars)
+    _record() # the run record stays at the bottom of the stack
+    _stack.append(record)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record['wall'] = time.perf_counter() - start
+        record['peak_rss_mb'] = peak_rss_mb()
+        _stack.pop()
+        _records.append(record)
+
+def collect(): # take the finished records (a worker sends them back to the parent)
+    records = _records[:]
+    del _records[:]
+    return records
+
+def merge(records):
+    _records.extend(records)
+
+def records(): # finished points followed by the run record
+    out = list(_records)
+    if _stack:
+        run = dict(_stack[0])
+        run['wall'] = time.perf_counter() - run.pop('start')
+        run['peak_rss_mb'] = peak_rss_mb()
+        out.append(run)
+    return out
+
+def report(out=sys.stderr): # per point: time, calls, items/s and share of every stage
+    for r in records():
+        params = ', '.join(f'{k}={v}' for k, v in r['point'].items())
+        print(f'[{params}] wall {r["wall"]:.3f} s, peak rss {r["peak_rss_mb"] or 0:.1f} MB', file=out)
+        for name, s in sorted(r['stages'].items(), key=lambda item: -item[1]['time']):
+            rate = f'{s["items"] / s["time"]:14,.0f} items/s' if s['items'] and s['time'] > 0 else ''
+            share = 100 * s['time'] / r['wall'] if r['wall'] else 0
+            print(f'    {name:12s} {s["time"]:9.4f} s {share:5.1f}%  {s["calls"]:7d} calls {rate}', file=out)
+        for name, n in r['counters'].items():
+            print(f'    {name:12s} {n}', file=out)
+
+def _at_exit():
+    if PROFILE.endswith('.json'):
+        with open(PROFILE, 'w') as f:
+            json.dump(records(), f, indent=2)
+    else:
+        report()
+
+if ENABLED:
+    atexit.register(_at_exit)
@@ -0,0 +1,79 @@
+import os
+import numpy as np
+
+# Optional compiled kernels for single long orbits
+# an orbit cannot be vectorized across time, so one orbit costs a Python call per step. when numba
+# is installed the loops below are compiled (njit) and maps.ChaoticMap.iterate uses them; otherwise
+# (or with NO_JIT=1 in the environment, then numba is not even imported) every caller keeps the
+# pure-Python code it always had.
+# the kernels repeat the float64 operations of the scalar maps in the same order and numba does
+# not reassociate them (no fastmath), so both backends give bit-identical orbits and counts.
+
+HAVE_NUMBA = False
+if not os.environ.get('NO_JIT'): # numba takes ~0.1 s to import, not worth it when it is switched off
+    try:
+        from numba import njit
+        HAVE_NUMBA = True
+    except ImportError:
+        pass
+if not HAVE_NUMBA:
+    def njit(*args, **kwargs): # the plain function
+        return args[0] if args and callable(args[0]) else (lambda f: f)
+
+ENABLED = HAVE_NUMBA
+
+BERNOULLI, LOGISTIC, PLM3 = 0, 1, 2 # kinds of map, see ChaoticMap.kernel
+
+@njit(cache=True)
+def step(kind, x, p): # one step of the map, p = parameters of ChaoticMap.kernel
+    if kind == BERNOULLI:
+        c = p[0]
+        if x < c:
+            return (x / c)
+        return (x - c) / (1 - c)
+    if kind == LOGISTIC:
+        return 4*x*(1-x)
+    a, a_positive, c1, c2, a1, a2 = p[0], p[1], p[2], p[3], p[4], p[5]
+    if x < c1:
+        return a1 * x
+    if x < c2:
+        if a_positive:
+            return a * (x - c1)
+        return a * (x - c2)
+    if x <= 1:
+        return a2 * (x - c2)
+    return np.nan
+
+@njit(cache=True)
+def orbit(kind, p, x0, n): # x0, f(x0), ..., f^(n-1)(x0)
+    out = np.empty(n)
+    x = x0
+    for i in range(n):
+        out[i] = x
+        x = step(kind, x, p)
+    return out
+
+@njit(cache=True)
+def pair_counts(kind, p, x0, n, t): # counts of 00, 01, 10, 11 over n bits and the bit after them, and f^n(x0)
+    counts = np.zeros(4, dtype=np.int64)
+    x = x0
+    prev = 0 if x < t else 1
+    for i in range(n):
+        x = step(kind, x, p)
+        b = 0 if x < t else 1
+        counts[2 * prev + b] += 1
+        prev = b
+    return counts, x
+
+def orbit_pair_counts(m, x0, n, t): # pair counts of n bits and the bit after them (as in markov.main) and the state after n points
+    if ENABLED:
+        kind, p = m.kernel()
+        return pair_counts(kind, p, x0, n, t)
+    from blocks import BlockCounter
+    from stream import OrbitStream, bit_chunks
+    counter = BlockCounter(2)
+    stream = OrbitStream(m, x0, n)
+    for b in bit_chunks(stream, t):
+        counter.add(b)
+    counter.add([0 if stream.state < t else 1])
+    return counter.counts, stream.state
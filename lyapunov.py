@@ -0,0 +1,92 @@
+import numpy as np
+from maps import PLM3Map, skew_bernouli_step, plm3_step
+
+# Lyapunov exponents and bifurcation diagrams over parameter grids
+# a family is (step, derivative, shape): one vectorized step advances the orbits of every parameter
+# value at once. after a transient the derivatives are collected into a (chunk, parameters) buffer
+# and log|f'(x)| is summed once per chunk, so memory stays at BUFFER floats whatever the orbit length.
+# bifurcation diagrams are accumulated the same way straight into a (parameters, bins) raster.
+
+BUFFER = 1 << 22 # floats per chunk buffer
+
+def logistic_family(r): # x -> r x (1 - x) for every r
+    r = np.asarray(r, dtype=float)
+    return (lambda x: r * x * (1 - x)), (lambda x: r * (1 - 2 * x)), r.shape
+
+def bernouli_family(c): # skew Bernoulli map for every c
+    c = np.asarray(c, dtype=float)
+    return (lambda x: skew_bernouli_step(x, c)), (lambda x: np.where(x < c, 1 / c, 1 / (1 - c))), c.shape
+
+def plm3_family(p1, p2): # plm3 map for every pair (p1, p2), p1 and p2 broadcast against each other
+    p1, p2 = np.broadcast_arrays(np.asarray(p1, dtype=float), np.asarray(p2, dtype=float))
+    params = np.array([PLM3Map(a, b).parameters() for a, b in zip(p1.ravel().tolist(), p2.ravel().tolist())], dtype=float)
+    t, a, a_positive, c1, c2, a1, a2 = (params[:, j].reshape(p1.shape) for j in range(7))
+    a_positive = a_positive.astype(bool)
+    step = lambda x: plm3_step(x, a, a_positive, c1, c2, a1, a2)
+    derivative = lambda x: np.where(x < c1, a1, np.where(x < c2, a, a2))
+    return step, derivative, p1.shape
+
+def _chunk(shape):
+    return max(1, BUFFER // max(1, int(np.prod(shape))))
+
+def _start(family, x0, transient): # orbits of every parameter after the transient
+    step, derivative, shape = family
+    x = np.array(np.broadcast_to(np.asarray(x0, dtype=float), shape))
+    for i in range(transient):
+        x = step(x)
+    return x
+
+def lyapunov(family, x0=0.1782612, n=100000, transient=1000): # mean of log|f'(x)| over n points of every orbit
+    step, derivative, shape = family
+    x = _start(family, x0, transient)
+    chunk = _chunk(shape)
+    buf = np.empty((chunk,) + shape)
+    total = np.zeros(shape)
+    done = 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        while done < n:
+            m = min(chunk, n - done)
+            for i in range(m):
+                buf[i] = derivative(x)
+                x = step(x)
+            d = np.abs(buf[:m])
+            total += np.log(d, out=d).sum(axis=0)
+            done += m
+    return total / n
+
+def bifurcation(family, x0=0.1782612, n=1000, transient=1000, bins=500, limits=(0, 1)): # (parameters, bins) visit counts and bin edges
+    step, derivative, shape = family
+    x = _start(family, x0, transient)
+    size = int(np.prod(shape))
+    column = np.arange(size) * bins
+    chunk = _chunk(shape)
+    buf = np.empty((chunk, size))
+    counts = np.zeros(size * bins, dtype=np.int64)
+    lo, hi = limits
+    done = 0
+    while done < n:
+        m = min(chunk, n - done)
+        for i in range(m):
+            buf[i] = x.ravel()
+            x = step(x)
+        b = np.floor((buf[:m] - lo) * (bins / (hi - lo)))
+        ok = (b >= 0) & (b < bins) # points outside the range (and nan) are dropped
+        counts += np.bincount((column + np.where(ok, b, 0).astype(np.int64))[ok], minlength=size * bins)
+        done += m
+    return counts.reshape(shape + (bins,)), np.linspace(lo, hi, bins + 1)
+
+def bernouli_exponent(c): # exact exponent, the invariant density is uniform
+    c = np.asarray(c, dtype=float)
+    return -(c * np.log(c) + (1 - c) * np.log(1 - c))
+
+def plm3_exponent(p1, p2): # exact exponent, the invariant density is uniform
+    m = PLM3Map(p1, p2)
+    return m.c1 * np.log(m.a1) + (m.c2 - m.c1) * np.log(abs(m.a)) + (1 - m.c2) * np.log(m.a2)
+
+if __name__ == "__main__":
+    c_params = [0.2, 0.3, 0.4, 0.5]
+    for c, lam in zip(c_params, lyapunov(bernouli_family(c_params))):
+        print(f'bernouli c = {c}: {lam:.6f} (exact {bernouli_exponent(c):.6f})')
+    print(f'logistic r = 4: {lyapunov(logistic_family(4.0)):.6f} (exact {np.log(2):.6f})')
+    for p1, p2 in [(0.01, 0.1), (0.4, 0.2), (0.9, 0.3), (0.9, 0.9)]:
+        print(f'plm3 p1 = {p1}, p2 = {p2}: {lyapunov(plm3_family(p1, p2)):.6f} (exact {plm3_exponent(p1, p2):.6f})')
@@ -0,0 +1,127 @@
+from abc import ABC, abstractmethod
+import numpy as np
+
+# Map objects shared by all scripts
+# breakpoints and slopes are computed once in the constructor; step is the scalar map,
+# step_array the vectorized one (same float64 arithmetic) and iterate(x0, n) returns an orbit of length n,
+# computed by the compiled loop of kernels.py when numba is available. kernels.py (and with it numba)
+# is imported on the first iterate, so importing the maps stays cheap.
+
+def skew_bernouli_step(x, c): # vectorized Bernoulli map (c may be an array broadcast against x)
+    return np.where(x < c, x / c, (x - c) / (1 - c))
+
+def logistic_step(x): # vectorized Logistic map
+    return 4 * x * (1 - x)
+
+def plm3_step(x, a, a_positive, c1, c2, a1, a2): # vectorized plm3 map, nan where the scalar map returns None
+    middle = np.where(a_positive, a * (x - c1), a * (x - c2))
+    outer = np.where(x <= 1, a2 * (x - c2), np.nan)
+    return np.where(x < c1, a1 * x, np.where(x < c2, middle, outer))
+
+class ChaoticMap(ABC):
+    __slots__ = ()
+
+    @abstractmethod
+    def step(self, x):
+        pass
+
+    @abstractmethod
+    def step_array(self, x):
+        pass
+
+    @abstractmethod
+    def kernel(self): # (kind, parameters) of the compiled step in kernels.py
+        pass
+
+    def iterate(self, x0, n): # orbit x0, f(x0), ..., f^(n-1)(x0)
+        import kernels
+        if kernels.ENABLED and n > 0:
+            return kernels.orbit(*self.kernel(), float(x0), n)
+        step = self.step
+        x = x0
+        seq = [x]
+        for i in range(1, n):
+            x = step(x)
+            seq.append(x)
+        return np.array(seq, dtype=float)
+
+class SkewBernoulliMap(ChaoticMap):
+    __slots__ = ('c',)
+
+    def __init__(self, c):
+        self.c = c
+
+    def step(self, x): # Bernoulli function
+        c = self.c
+        if x < c:
+            return (x / c)
+        else:
+            return (x - c) / (1 - c)
+
+    def step_array(self, x):
+        return skew_bernouli_step(x, self.c)
+
+    def kernel(self):
+        from kernels import BERNOULLI
+        return BERNOULLI, np.array([self.c], dtype=float)
+
+class LogisticMap(ChaoticMap):
+    __slots__ = ()
+
+    def step(self, x): # Logistic function
+        return 4*x*(1-x)
+
+    def step_array(self, x):
+        return logistic_step(x)
+
+    def kernel(self):
+        from kernels import LOGISTIC
+        return LOGISTIC, np.zeros(1)
+
+class PLM3Map(ChaoticMap): # piecewise linear Markov map with transition probabilities p1 (0 -> 1) and p2 (1 -> 0)
+    __slots__ = ('p_1', 'p_2', 't', 'a', 'a_positive', 'c1', 'c2', 'a1', 'a2')
+
+    def __init__(self, p_1, p_2, t=None):
+        if t is None: # threshold of the stationary distribution
+            t = p_2 / (p_1 + p_2)
+        a = 1 / (1 - (p_1 + p_2))
+        if a > 0:
+            a_positive = True
+            c1 = t * (1 - (1/a))
+            c2 = t + ((1 - t)/a)
+        else:
+            a_positive = False
+            c1 = t + ((1 - t)/a)
+            c2 = t * (1 - (1/a))
+        self.p_1 = p_1
+        self.p_2 = p_2
+        self.t = t
+        self.a = a
+        self.a_positive = a_positive
+        self.c1 = c1
+        self.c2 = c2
+        self.a1 = 1 / c1
+        self.a2 = 1 / (1 - c2)
+
+    def parameters(self): # same tuple as the old create_parameters
+        return self.t, self.a, self.a_positive, self.c1, self.c2, self.a1, self.a2
+
+    def step(self, x):
+        if x < self.c1:
+            return self.a1 * x
+        elif x < self.c2:
+            if self.a_positive:
+                return self.a * (x - self.c1)
+            else:
+                return self.a * (x - self.c2)
+        elif x <= 1:
+            return self.a2 * (x - self.c2)
+        else:
+            return None  # Handle case when x is outside [0, 1]
+
+    def step_array(self, x):
+        return plm3_step(x, self.a, self.a_positive, self.c1, self.c2, self.a1, self.a2)
+
+    def kernel(self):
+        from kernels import PLM3
+        return PLM3, np.array([self.a, self.a_positive, self.c1, self.c2, self.a1, self.a2], dtype=float)
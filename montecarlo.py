@@ -0,0 +1,146 @@
+import math
+import numpy as np
+from bitslice import sliced
+from cache import cached_sequence
+from instrument import stage
+
+# Monte Carlo simulation of a linear block code (codes.py)
+# the information bits come from a chaotic orbit or the exact c = 1/2 source of symbolic.py (k consecutive
+# bits per codeword) and the error bits from a channel error model (channel.py, n consecutive bits per codeword);
+# the code is simulated CW codewords at a time, 64 codewords per word (bitslice.py).
+
+CW = 1 << 14 # codewords per block
+
+class Rows: # (l, k) information bits, rows[a:b] unpacks only bits a*k .. b*k of a sequence with bits(start, stop)
+    def __init__(self, seq, l, k):
+        self.seq, self.l, self.k = seq, l, k
+
+    def __len__(self):
+        return self.l
+
+    def __getitem__(self, rows): # only the requested rows are unpacked, so an adaptive run that stops early reads no more
+        start, stop, _ = rows.indices(self.l)
+        lo, hi = start * self.k, stop * self.k
+        with stage('unpack', hi - lo):
+            return self.seq.bits(lo, hi).reshape(-1, self.k)
+
+def exact_bits(l, k, c='1/2', x0=None): # information bits of l codewords as (l, k) Rows of the exact skew Bernoulli source (symbolic.py)
+    from symbolic import ExactSource, X0
+    return Rows(ExactSource(c, X0 if x0 is None else x0), l, k)
+
+def source_bits(src, x0, t, l, k): # information bits of l codewords as (l, k) Rows, through the sequence cache
+    with stage('source', k * l):
+        return Rows(cached_sequence(src, x0, k * l, t)[0], l, k)
+
+def simulate(code, info, channel, l): # encode, add the errors of the channel, decode and count
+    total = dict.fromkeys(('ok', 'blerr', 'berr0', 'berr', 'derr'), 0)
+    for start in range(0, l, CW):
+        m = min(CW, l - start)
+        with stage('errors', code.n * m):
+            e = channel.bits(code.n * m).reshape(m, code.n) # error sequence of each codeword
+        counts = sliced(code).simulate(info[start:start + m], e)
+        for key in total:
+            total[key] += counts[key]
+    return total
+
+# Adaptive runs
+# simulate_adaptive counts in growing batches and stops once the confidence interval of every watched
+# rate is within rel * estimate on each side, or when the budget (all rows of info) is used up.
+# bit-error rates treat the n bits of a codeword as separate trials, which ignores the correlation
+# of errors inside a codeword, so their intervals are somewhat optimistic for Markov errors.
+
+Z = 1.959963984540054 # two-sided 95% normal quantile
+ALPHA = 0.05
+RATES = {'undetected': 'derr', 'block': 'blerr', 'bit_before': 'berr0', 'bit_after': 'berr'} # rate -> counter
+
+def wilson(k, n, z=Z): # Wilson score interval of k successes in n trials
+    if n == 0:
+        return 0.0, 1.0
+    p = k / n
+    d = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / d
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / d
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+def _betacf(a, b, x): # continued fraction of the incomplete beta function (modified Lentz)
+    tiny = 1e-300
+    c, d = 1.0, 1 - (a + b) * x / (a + 1)
+    d = 1 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 100000):
+        for num in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)), -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1 + num * d
+            d = 1 / (d if abs(d) > tiny else tiny)
+            c = 1 + num / c
+            c = c if abs(c) > tiny else tiny
+            h *= d * c
+        if abs(d * c - 1) < 1e-15:
+            break
+    return h
+
+def beta_cdf(x, a, b): # regularized incomplete beta function I_x(a, b)
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x))
+    if x < (a + 1) / (a + b + 2):
+        return front * _betacf(a, b, x) / a
+    return 1 - front * _betacf(b, a, 1 - x) / b
+
+def beta_ppf(q, a, b): # inverse of beta_cdf by bisection
+    lo, hi = 0.0, 1.0
+    for i in range(100):
+        mid = (lo + hi) / 2
+        if beta_cdf(mid, a, b) < q:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+def clopper_pearson(k, n, alpha=ALPHA): # exact (conservative) binomial interval
+    lo = 0.0 if k == 0 else beta_ppf(alpha / 2, k, n - k + 1)
+    hi = 1.0 if k == n else beta_ppf(1 - alpha / 2, k + 1, n - k)
+    return lo, hi
+
+def interval(k, n, method='wilson'):
+    if method == 'wilson':
+        return wilson(k, n)
+    if method == 'clopper-pearson':
+        return clopper_pearson(k, n)
+    raise ValueError(f'unknown interval method {method!r}')
+
+def rates(code, counts, l, method='wilson'): # rate -> (estimate, low, high) from the counters of l codewords
+    result = {}
+    for name, key in RATES.items():
+        trials = l * code.n if name.startswith('bit') else l
+        lo, hi = interval(counts[key], trials, method)
+        result[name] = (counts[key] / trials if trials else 0.0, lo, hi)
+    return result
+
+def precise(rate, rel): # interval within rel * estimate on both sides
+    estimate, lo, hi = rate
+    return estimate > 0 and estimate - lo <= rel * estimate and hi - estimate <= rel * estimate
+
+def simulate_adaptive(code, info, channel, rel=0.05, watch=('block',), method='wilson', first=1024): # counters, number of codewords and rates
+    budget = len(info)
+    total = dict.fromkeys(('ok', 'blerr', 'berr0', 'berr', 'derr'), 0)
+    l = 0
+    batch = first
+    while l < budget:
+        m = min(batch, budget - l)
+        counts = simulate(code, info[l:l + m], channel, m)
+        for key in total:
+            total[key] += counts[key]
+        l += m
+        r = rates(code, total, l, method)
+        if all(precise(r[name], rel) for name in watch):
+            break
+        batch = min(2 * batch, CW * 16) # growing batches, so the checks cost nothing
+    return total, l, rates(code, total, l, method)
+
+def simulate_point(code, info, channel, l, rel=None, watch=('block',), method='wilson'): # fixed l codewords, or adaptive (rel) with the rows of info as budget
+    if rel is None:
+        counts = simulate(code, info, channel, l)
+        return counts, l, rates(code, counts, l, method)
+    return simulate_adaptive(code, info, channel, rel, watch, method)
@@ -0,0 +1,192 @@
+import argparse
+import time
+from functools import partial
+import numpy as np
+from bitslice import sliced
+from channel import MemorylessErrors, MarkovErrors
+from codes import PARITY43, HAMMING74
+from montecarlo import CW
+from stream import OrbitStream, bit_chunks
+from sweep import grid, run_sweep
+from instrument import stage
+
+# Communication pipelines: source -> encoder -> channel -> decoder -> metrics
+# a frame is a dict of arrays for (at most) cw codewords: 'info' (m, k) from the source, 'sent' (m, n)
+# from the encoder, 'errors' and 'received' from the channel, 'syndrome' and 'decoded' from the decoder.
+# a source is a generator of frames and every other stage is a function frames -> frames (a generator
+# too), so only one frame is alive at a time whatever the number of codewords. metrics take the
+# frames at the end with add(frame). an experiment is a configuration: the list of stages.
+# with the same cw as montecarlo.simulate the channel draws the same error bits and the counters are
+# those of montecarlo.simulate, so the configs below reproduce hamming.py and hamming1.py.
+#   python pipeline.py -l 100000
+
+PIECE = 1 << 22 # bits generated at a time by exact_source
+
+def rechunk(pieces, size): # 1-d arrays -> arrays of size elements (the last one may be shorter)
+    buf, have = [], 0
+    for piece in pieces:
+        while len(piece):
+            take = min(size - have, len(piece))
+            buf.append(piece[:take])
+            have += take
+            piece = piece[take:]
+            if have == size:
+                yield np.concatenate(buf)
+                buf, have = [], 0
+    if have:
+        yield np.concatenate(buf)
+
+def frames(bits, k): # frames of k-bit information words from chunks of k * cw bits
+    for chunk in bits:
+        yield {'info': chunk.reshape(-1, k)}
+
+# Sources
+
+def chaotic_source(m, x0, t, k, l, cw=CW): # thresholded orbit of a map, as montecarlo.source_bits
+    return frames(rechunk(bit_chunks(OrbitStream(m, x0, k * l), t), k * cw), k)
+
+def exact_source(k, l, c='1/2', x0=None, cw=CW): # exact skew Bernoulli bits (symbolic.py)
+    from symbolic import ExactSource, X0 as EXACT_X0
+    src = ExactSource(c, EXACT_X0 if x0 is None else x0)
+    pieces = (src.bits(start, min(start + PIECE, k * l)) for start in range(0, k * l, PIECE))
+    return frames(rechunk(pieces, k * cw), k)
+
+def random_source(k, l, seed=None, cw=CW): # independent uniform bits
+    rng = np.random.default_rng(seed)
+    return frames((rng.integers(0, 2, min(k * cw, k * (l - start)), dtype=np.uint8) for start in range(0, l, cw)), k)
+
+# Stages
+
+def encoder(code):
+    def encode(frames):
+        for frame in frames:
+            with stage('encode', len(frame['info'])):
+                frame['sent'] = code.encode(frame['info'])
+            yield frame
+    return encode
+
+def channel(model, n): # errors of an error model (channel.py), n consecutive bits per codeword
+    def transmit(frames):
+        for frame in frames:
+            m = len(frame['info'])
+            with stage('errors', m * n):
+                frame['errors'] = model.bits(m * n).reshape(m, n)
+            if 'sent' in frame: # not needed before sliced_codec
+                frame['received'] = frame['sent'] ^ frame['errors']
+            yield frame
+    return transmit
+
+def decoder(code): # syndrome decoding with the coset leaders
+    def decode(frames):
+        for frame in frames:
+            with stage('decode', len(frame['received'])):
+                frame['syndrome'] = code.syndrome(frame['received'])
+                frame['decoded'] = frame['received'] ^ code.leaders[frame['syndrome']]
+            yield frame
+    return decode
+
+def sliced_codec(code): # encoder and decoder in one, 64 codewords per word (bitslice.py); adds 'counts' instead of 'decoded'
+    def codec(frames):
+        for frame in frames:
+            frame['counts'] = sliced(code).simulate(frame['info'], frame['errors'])
+            yield frame
+    return codec
+
+# Metrics
+
+class CodeCounters: # the counters of LinearBlockCode.simulate
+    KEYS = ('ok', 'blerr', 'berr0', 'berr', 'derr')
+
+    def __init__(self):
+        self.counts = dict.fromkeys(self.KEYS, 0)
+        self.codewords = 0
+
+    def add(self, frame):
+        self.codewords += len(frame['info'])
+        if 'counts' in frame: # already counted by sliced_codec
+            for key in self.KEYS:
+                self.counts[key] += frame['counts'][key]
+            return
+        with stage('count', len(frame['info'])):
+            wrong = (frame['decoded'] ^ frame['sent']).astype(bool)
+            blerr = int(np.count_nonzero(wrong.any(axis=1)))
+            self.counts['ok'] += len(wrong) - blerr
+            self.counts['blerr'] += blerr
+            self.counts['berr0'] += int(np.count_nonzero(frame['errors']))
+            self.counts['berr'] += int(np.count_nonzero(wrong))
+            self.counts['derr'] += int(np.count_nonzero(frame['errors'].any(axis=1) & (frame['syndrome'] == 0)))
+
+    def result(self):
+        return dict(self.counts)
+
+class Throughput: # codewords per second from the first to the last frame
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.codewords = 0
+
+    def add(self, frame):
+        self.codewords += len(frame['info'])
+
+    def result(self):
+        return self.codewords / max(time.perf_counter() - self.start, 1e-12)
+
+def run(source, stages, metrics): # push every frame of the source through the stages into the metrics
+    frames = source
+    for s in stages:
+        frames = s(frames)
+    for frame in frames:
+        for metric in metrics:
+            metric.add(frame)
+    return [metric.result() for metric in metrics]
+
+# Configurations of hamming.py / hamming1.py
+
+def code_experiment(code, errors, l, fast=True, source=None): # (counters, codewords per second) of one point
+    source = exact_source(code.k, l) if source is None else source # the information source of hamming.py / hamming1.py
+    if fast:
+        stages = [channel(errors, code.n), sliced_codec(code)]
+    else:
+        stages = [encoder(code), channel(errors, code.n), decoder(code)]
+    return run(source, stages, [CodeCounters(), Throughput()])
+
+P_LIST = [0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.4, 0.45, 0.49999]
+P2_LIST = [0.16, 0.34]
+
+def memoryless_errors(p, backend='chaotic', seed=None): # error source of memoryless_bernoulli (c = t = 1-p)
+    return MemorylessErrors(p, backend, seed=seed)
+
+def markov_errors(p, p2, backend='chaotic', seed=None): # error source of markov, P(1) = p
+    return MarkovErrors(p / (1 - p) * p2, p2, backend, t=1 - p, seed=seed)
+
+CONFIGS = { # name -> (code, error source of a point, watched counter, points)
+    'hamming.memoryless_bernoulli': (PARITY43, memoryless_errors, 'derr', grid(p=P_LIST)),
+    'hamming.markov': (PARITY43, markov_errors, 'derr', grid(p=P_LIST, p2=P2_LIST)),
+    'hamming1.memoryless_bernoulli': (HAMMING74, memoryless_errors, 'blerr', grid(p=P_LIST)),
+    'hamming1.markov': (HAMMING74, markov_errors, 'blerr', grid(p=P_LIST, p2=P2_LIST)),
+}
+
+def config_point(name, l, fast=True, backend='chaotic', seed=None, **point): # counters and codewords/s of one point of a config
+    code, errors, watch, points = CONFIGS[name]
+    return code_experiment(code, errors(**point, backend=backend, seed=seed), l, fast)
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description='the hamming.py / hamming1.py experiments as pipelines')
+    p.add_argument('configs', nargs='*', default=list(CONFIGS))
+    p.add_argument('-l', type=int, default=1000000, help='codewords per point')
+    p.add_argument('--staged', action='store_true', help='separate encoder and decoder stages instead of the bit-sliced codec')
+    p.add_argument('--backend', choices=('chaotic', 'random'), default='chaotic', help='error source backend (channel.py)')
+    p.add_argument('--seed', type=int, default=0, help='seed of the random backend')
+    p.add_argument('--workers', type=int, default=None)
+    args = p.parse_args(argv)
+    for name in args.configs:
+        code, errors, watch, points = CONFIGS[name]
+        print(f'\n{name}: {code.name}')
+        task = partial(config_point, name=name, l=args.l, fast=not args.staged, backend=args.backend)
+        results = run_sweep(task, points, args.workers, seed=args.seed if args.backend == 'random' else None)
+        for point, (counts, rate) in zip(points, results):
+            params = ', '.join(f'{k}: {v}' for k, v in point.items())
+            print(f'{params}; {watch}: {counts[watch] / args.l:.5f}, bit errors before: {counts["berr0"] / (code.n * args.l):.5f}, '
+                  f'after: {counts["berr"] / (code.n * args.l):.5f} ({rate:,.0f} codewords/s)')
+
+if __name__ == '__main__':
+    main()
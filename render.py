@@ -0,0 +1,82 @@
+import numpy as np
+from sweep import run_sweep
+from instrument import stage
+
+# Figure rendering
+# a figure is a declarative spec: the output path, figure keyword arguments and a list of calls
+# (method name, args, kwargs) made on its axes in order, e.g. call('set_ylim', 0, 2).
+# data goes in already reduced (binned densities, decimated traces), every figure is closed
+# as soon as it is saved, and independent specs are rendered by a process pool (sweep.run_sweep).
+# matplotlib is imported on the first render, so building specs costs nothing.
+# image_difference compares a rendered figure with a baseline png (e.g. the committed result/*.png).
+
+def pyplot(): # matplotlib.pyplot on the headless Agg backend
+    import matplotlib
+    matplotlib.use('Agg') # figures are only ever written to files
+    import matplotlib.pyplot as plt
+    return plt
+
+def call(method, *args, **kwargs): # one axes call of a spec
+    return (method, args, kwargs)
+
+def figure(path, calls, **fig_kw): # spec of one png
+    return {'path': path, 'calls': calls, 'fig_kw': fig_kw}
+
+def render(path, calls, fig_kw=None): # draw one spec and save it, the figure is always closed
+    plt = pyplot()
+    with stage('render'):
+        fig = plt.figure(**(fig_kw or {}))
+        try:
+            ax = fig.gca()
+            for method, args, kwargs in calls:
+                getattr(ax, method)(*args, **kwargs)
+            fig.savefig(path)
+        finally:
+            plt.close(fig)
+    return path
+
+def render_all(specs, workers=None): # render independent specs in parallel, returns the paths in order
+    return run_sweep(render, specs, workers)
+
+def decimate(x, y, max_points=4096): # min/max envelope of a long trace, enough points for any raster
+    x, y = np.asarray(x), np.asarray(y)
+    if len(y) <= max_points:
+        return x, y
+    m = max_points // 2
+    edges = np.linspace(0, len(y), m + 1).astype(np.int64)
+    ilo = edges[:-1] + np.array([np.argmin(y[a:b]) for a, b in zip(edges[:-1], edges[1:])])
+    ihi = edges[:-1] + np.array([np.argmax(y[a:b]) for a, b in zip(edges[:-1], edges[1:])])
+    idx = np.sort(np.unique(np.concatenate((ilo, ihi, [0, len(y) - 1]))))
+    return x[idx], y[idx]
+
+def density_calls(edges, density, title): # invariant-density bar chart of the assignments
+    return [
+        call('hist', edges[:-1], bins=edges, weights=density, rwidth=0.4, color='r', density=True),
+        call('set_xlim', 0, 1),
+        call('set_ylim', 0, 2),
+        call('set_yticks', [0, 0.5, 1, 1.5, 2]),
+        call('hlines', 1, 0, 1, color='b', linewidth=1),
+        call('set_xlabel', "x", fontsize=14),
+        call('set_ylabel', "invariant density", fontsize=14),
+        call('set_title', title, loc="left"),
+    ]
+
+def orbit_calls(x, n, title): # two orbits from nearby initial values
+    return [
+        call('plot', x[0, :n+1], color='r', label=f"initial value = {x[0, 0]}", linewidth=1.25),
+        call('plot', x[1, :n+1], color='k', label=f"initial value = {x[1, 0]}", linewidth=1.25),
+        call('legend', loc='upper center', bbox_to_anchor=(0.79, 1.16)),
+        call('set_xlim', 0, n),
+        call('set_ylim', 0, 1),
+        call('set_yticks', [0, 0.5, 1]),
+        call('set_xlabel', "n", fontsize=14),
+        call('set_ylabel', "Xn", fontsize=14),
+        call('set_title', title, loc="left"),
+    ]
+
+def image_difference(path, baseline, tol=0.1): # fraction of pixels that differ by more than tol in some channel
+    plt = pyplot()
+    a, b = plt.imread(path), plt.imread(baseline)
+    if a.shape != b.shape:
+        return 1.0
+    return float((np.abs(a - b).max(axis=-1) > tol).mean())
@@ -0,0 +1,178 @@
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import numpy as np
+from sweep import run_sweep
+
+# Batch statistics of every saved sequence file
+# finds the outputs of entropy.main2 (assignment2/<c>/2_<c>.txt|.bseq) and markov.main2
+# (assignment3/2/p1:<p1>, p2:<p2>/...) and takes the source parameters from the directory names.
+# every file is memory-mapped and split into shards of SHARD bits; the shards are counted in the
+# sweep pool (sweep.py) and reduced in order: symbol and pair counts add up (plus the pair across
+# every shard boundary) and the runs cut by a boundary are joined before they enter the histograms.
+# a manifest (json, .scanmanifest.json by default, not versioned) keeps the size, mtime and result of
+# every file, unchanged files are not read again.
+#   python scan.py --workers 4 --format csv
+
+ROOTS = ['assignment2', 'assignment3/2']
+EXTENSIONS = ('.txt', '.bseq')
+SHARD = 1 << 23 # bits per task
+MANIFEST = os.environ.get('SCAN_MANIFEST', '.scanmanifest.json')
+
+def parameters(path): # (map, params) from the names of the directories above path
+    for name in reversed(os.path.dirname(path).split(os.sep)):
+        pairs = re.findall(r'(\w+):\s*([-+.\deE]+)', name)
+        if pairs:
+            return 'plm3', {k: float(v) for k, v in pairs}
+        try:
+            return 'skew_bernoulli', {'c': float(name)}
+        except ValueError:
+            pass
+    return None, {}
+
+def discover(roots=ROOTS): # sequence files under the roots, sorted
+    found = []
+    for root in roots:
+        for directory, dirs, files in os.walk(root):
+            found += [os.path.join(directory, f) for f in files if f.endswith(EXTENSIONS)]
+    return sorted(found)
+
+def length(path): # number of bits in the file
+    if path.endswith('.txt'):
+        return os.path.getsize(path)
+    from seqfile import read_header
+    return read_header(path)[0]['length']
+
+def shard_bits(path, start, stop): # bits[start:stop] of the memory-mapped file
+    from seqfile import open_sequence
+    return open_sequence(path).bits(start, stop)
+
+def shard_stats(path, start, stop): # counts of one shard; the first and last run may continue in the neighbours
+    b = np.asarray(shard_bits(path, start, stop), dtype=np.uint8)
+    pairs = np.bincount(2 * b[:-1] + b[1:], minlength=4)
+    bounds = np.concatenate(([0], np.flatnonzero(b[1:] != b[:-1]) + 1, [len(b)]))
+    runs = np.diff(bounds)
+    symbols = b[bounds[:-1]]
+    inner, inner_symbols = runs[1:-1], symbols[1:-1]
+    return {'n': len(b), 'ones': int(b.sum()), 'pairs': pairs, 'first': int(b[0]), 'last': int(b[-1]),
+            'head': int(runs[0]), 'tail': int(runs[-1]), 'single': len(runs) == 1,
+            'runs': [np.bincount(inner[inner_symbols == s]) for s in (0, 1)]}
+
+def _add(hist, runs): # hist += runs, growing hist as needed
+    if len(runs) > len(hist):
+        hist = np.concatenate((hist, np.zeros(len(runs) - len(hist), dtype=np.int64)))
+    hist[:len(runs)] += runs
+    return hist
+
+def reduce_shards(parts): # statistics of a whole file from its shards, in order
+    n, ones, pairs = 0, 0, np.zeros(4, dtype=np.int64)
+    hist = [np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64)] # hist[s][k]: runs of k symbols s
+    run = None # (symbol, length) of the run still open at the end of the previous shard
+
+    def close(symbol, k):
+        hist[symbol] = _add(hist[symbol], np.bincount([k]))
+
+    for part in parts:
+        if part['n'] == 0:
+            continue
+        if run is not None:
+            pairs[2 * run[0] + part['first']] += 1
+        n, ones, pairs = n + part['n'], ones + part['ones'], pairs + part['pairs']
+        head = part['head']
+        if run is not None and run[0] == part['first']:
+            head += run[1]
+        elif run is not None:
+            close(*run)
+        if part['single']:
+            run = (part['first'], head)
+            continue
+        close(part['first'], head)
+        for s in (0, 1):
+            hist[s] = _add(hist[s], part['runs'][s])
+        run = (part['last'], part['tail'])
+    if run is not None:
+        close(*run)
+    return summary(n, ones, pairs, hist)
+
+def summary(n, ones, pairs, hist): # row of symbol, transition and run-length statistics
+    row = {'n': n, 'P(1)': ones / n if n else float('nan')}
+    (c00, c01), (c10, c11) = pairs.reshape(2, 2).tolist()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        row['P(1|0)'] = float(np.float64(c01) / (c00 + c01))
+        row['P(0|1)'] = float(np.float64(c10) / (c10 + c11))
+    for s in (0, 1):
+        k = np.arange(len(hist[s]))
+        runs = int(hist[s].sum())
+        row[f'runs{s}'] = runs
+        row[f'mean_run{s}'] = float((k * hist[s]).sum() / runs) if runs else float('nan')
+        row[f'max_run{s}'] = int(k[hist[s] > 0].max()) if runs else 0
+    return row
+
+def load_manifest(path):
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+def save_manifest(path, manifest): # through a unique temporary file, so concurrent scans don't collide
+    if path:
+        fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(os.path.abspath(path)))
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, path)
+
+def scan(roots=ROOTS, workers=None, shard=SHARD, manifest=MANIFEST): # one row per file; (rows, number of files read)
+    files = discover(roots)
+    entries = load_manifest(manifest)
+    stale = []
+    for path in files:
+        st = os.stat(path)
+        entry = entries.get(path)
+        if entry is None or entry['size'] != st.st_size or entry['mtime'] != st.st_mtime_ns:
+            stale.append((path, st))
+
+    points = []
+    for path, st in stale:
+        bits = length(path)
+        points += [{'path': path, 'start': start, 'stop': min(start + shard, bits)} for start in range(0, bits, shard)]
+    by_file = {}
+    for p, part in zip(points, run_sweep(shard_stats, points, workers) if points else []):
+        by_file.setdefault(p['path'], []).append(part)
+    for path, st in stale:
+        entries[path] = {'size': st.st_size, 'mtime': st.st_mtime_ns, 'stats': reduce_shards(by_file.get(path, []))}
+    for path in list(entries):
+        if path not in files and any(path.startswith(root) for root in roots):
+            del entries[path] # removed since the last scan
+    save_manifest(manifest, entries)
+
+    rows = []
+    for path in files:
+        source, params = parameters(path)
+        if source is None and path.endswith('.bseq'): # not in a parameter directory, use the file header
+            from seqfile import read_header
+            header = read_header(path)[0]
+            source, params = header.get('map'), header.get('params') or {}
+        row = {'file': path, 'map': source}
+        row.update(params)
+        row.update(entries[path]['stats'])
+        rows.append(row)
+    return rows, len(stale)
+
+def main(argv=None):
+    from cli import emit
+    p = argparse.ArgumentParser(description='statistics of every saved sequence file')
+    p.add_argument('roots', nargs='*', default=ROOTS)
+    p.add_argument('--workers', type=int, default=None)
+    p.add_argument('--shard', type=int, default=SHARD, help='bits per task')
+    p.add_argument('--manifest', default=MANIFEST, help="'' to read every file again")
+    p.add_argument('--format', choices=('text', 'json', 'csv'), default='text')
+    args = p.parse_args(argv)
+    rows, read = scan(args.roots, args.workers, args.shard, args.manifest)
+    print(f'{len(rows)} files, {read} read, {len(rows) - read} unchanged', file=sys.stderr)
+    emit(rows, args.format)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+import numpy as np
+import json
+import os
+import struct
+import sys
+
+# Bit-packed sequence files (.bseq)
+# layout: magic b'BSEQ', version (uint16), header size (uint16), json header, space padding up to
+# a multiple of 16 bytes, then the sequence packed 8 bits per byte (np.packbits).
+# the json header holds the map type, its parameters, the initial value, the length and the bit order.
+
+MAGIC = b'BSEQ'
+VERSION = 1
+ALIGN = 16
+PAD = b' ' # padding byte after the json header
+PREFIX = struct.Struct('<4sHH')
+CHUNK = 1 << 24 # bits per chunk of PackedSequence.chunks
+
+def make_header(length, map=None, params=None, iv=None, bitorder='big'): # header dictionary of a sequence file
+    if bitorder not in ('big', 'little'):
+        raise ValueError(f"bitorder must be 'big' or 'little', not {bitorder!r}")
+    return {'map': map, 'params': params, 'iv': iv, 'length': int(length), 'bitorder': bitorder}
+
+def encode_header(header): # prefix + json + padding, so that the data starts aligned
+    body = json.dumps(header).encode('utf-8')
+    size = PREFIX.size + len(body)
+    pad = -size % ALIGN
+    return PREFIX.pack(MAGIC, VERSION, len(body) + pad) + body + PAD * pad
+
+def read_header(path): # returns (header, offset of the packed data)
+    with open(path, 'rb') as f:
+        magic, version, size = PREFIX.unpack(f.read(PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a bit-packed sequence file')
+        if version != VERSION:
+            raise ValueError(f'{path}: unsupported sequence file version {version}')
+        header = json.loads(f.read(size).rstrip(PAD).decode('utf-8'))
+    return header, PREFIX.size + size
+
+class SequenceWriter: # writes bits into a preallocated packed file, in as many pieces as needed
+    def __init__(self, path, length, map=None, params=None, iv=None, bitorder='big'):
+        self.header = make_header(length, map, params, iv, bitorder)
+        self.path = path
+        self.length = int(length)
+        self.bitorder = bitorder
+        self.pos = 0 # number of bits written so far
+        self.pending = np.zeros(0, dtype=np.uint8) # bits that don't fill a whole byte yet
+        prefix = encode_header(self.header)
+        nbytes = (self.length + 7) // 8
+        with open(path, 'wb') as f:
+            f.write(prefix)
+            f.truncate(len(prefix) + nbytes)
+        self.offset = len(prefix)
+        self.packed = np.memmap(path, dtype=np.uint8, mode='r+', offset=self.offset, shape=(nbytes,)) if nbytes else np.zeros(0, dtype=np.uint8)
+
+    def write(self, bits): # append an array of 0/1 values
+        bits = np.asarray(bits, dtype=np.uint8)
+        if self.pos + len(self.pending) + len(bits) > self.length:
+            raise ValueError(f'writing past the declared length {self.length}')
+        if len(self.pending):
+            bits = np.concatenate((self.pending, bits))
+        full = len(bits) - len(bits) % 8
+        start = self.pos // 8
+        self.packed[start:start + full // 8] = np.packbits(bits[:full], bitorder=self.bitorder)
+        self.pos += full
+        self.pending = bits[full:].copy()
+
+    def close(self):
+        if len(self.pending):
+            self.packed[self.pos // 8] = np.packbits(self.pending, bitorder=self.bitorder)[0]
+            self.pos += len(self.pending)
+            self.pending = np.zeros(0, dtype=np.uint8)
+        if self.pos != self.length:
+            raise ValueError(f'{self.path}: wrote {self.pos} bits, header says {self.length}')
+        if isinstance(self.packed, np.memmap):
+            self.packed.flush()
+        self.packed = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+class PackedSequence: # memory-mapped reader, only the requested range is unpacked
+    def __init__(self, path):
+        self.path = path
+        self.header, self.offset = read_header(path)
+        self.length = self.header['length']
+        self.bitorder = self.header['bitorder']
+        nbytes = (self.length + 7) // 8
+        self.packed = np.memmap(path, dtype=np.uint8, mode='r', offset=self.offset, shape=(nbytes,)) if nbytes else np.zeros(0, dtype=np.uint8)
+
+    def __len__(self):
+        return self.length
+
+    def __reduce__(self): # pickled as its path, workers map the file themselves
+        return PackedSequence, (self.path,)
+
+    def bits(self, start=0, stop=None): # unpacked bits[start:stop] as uint8
+        stop = self.length if stop is None else min(stop, self.length)
+        if start >= stop:
+            return np.zeros(0, dtype=np.uint8)
+        first, last = start // 8, (stop + 7) // 8
+        bits = np.unpackbits(self.packed[first:last], bitorder=self.bitorder)
+        return bits[start - 8 * first:stop - 8 * first]
+
+    def chunks(self, start=0, stop=None, chunk=CHUNK): # bits[start:stop] unpacked chunk by chunk
+        stop = self.length if stop is None else min(stop, self.length)
+        for pos in range(start, stop, chunk):
+            yield self.bits(pos, min(pos + chunk, stop))
+
+class TextSequence: # memory-mapped reader of an old '0'/'1' text file, same interface as PackedSequence
+    def __init__(self, path):
+        self.path = path
+        self.length = os.path.getsize(path)
+        self.text = np.memmap(path, dtype=np.uint8, mode='r') if self.length else np.zeros(0, dtype=np.uint8)
+
+    def __len__(self):
+        return self.length
+
+    def __reduce__(self):
+        return TextSequence, (self.path,)
+
+    def bits(self, start=0, stop=None): # bits[start:stop] as uint8, only that range is read
+        return text_bits(self.text[start:stop], self.path, start)
+
+    chunks = PackedSequence.chunks
+
+def open_sequence(path): # memory-mapped reader of either format
+    return TextSequence(path) if path.endswith('.txt') else PackedSequence(path)
+
+def write_sequence(path, bits, map=None, params=None, iv=None, bitorder='big'): # write a whole sequence at once
+    with SequenceWriter(path, len(bits), map, params, iv, bitorder) as w:
+        w.write(bits)
+
+def text_bits(raw, path, offset=0): # '0'/'1' bytes -> 0/1 values; any other byte (a trailing newline too) is an error
+    bits = raw - np.uint8(ord('0'))
+    if len(bits) and bits.max() > 1:
+        i = int(np.argmax(bits > 1))
+        raise ValueError(f'{path}: byte {bytes(raw[i:i + 1])!r} at offset {offset + i} is not a 0 or 1')
+    return bits
+
+def read_txt(path): # bits of an old '0'/'1' text file
+    return text_bits(np.fromfile(path, dtype=np.uint8), path)
+
+def read_bits(path): # bits of either format
+    if path.endswith('.txt'):
+        return read_txt(path)
+    return PackedSequence(path).bits()
+
+def txt_to_packed(txt_path, path=None, **header): # convert an old .txt result, returns the new path
+    if path is None:
+        path = os.path.splitext(txt_path)[0] + '.bseq'
+    write_sequence(path, read_txt(txt_path), **header)
+    return path
+
+def packed_to_txt(path, txt_path=None): # convert back to the '0'/'1' text format
+    if txt_path is None:
+        txt_path = os.path.splitext(path)[0] + '.txt'
+    (PackedSequence(path).bits() + ord('0')).astype(np.uint8).tofile(txt_path)
+    return txt_path
+
+if __name__ == '__main__': # python seqfile.py <file.txt | file.bseq> ... converts in either direction
+    for p in sys.argv[1:]:
+        print(p, '->', txt_to_packed(p) if p.endswith('.txt') else packed_to_txt(p))
@@ -0,0 +1,63 @@
+import numpy as np
+from trajectory import iterate_grid, threshold_grid, bernouli_setup, logistic_setup, plm3_setup
+from instrument import stage
+
+# Chunked streaming generation
+# an orbit of length n is produced in fixed-size chunks and only the next state is carried
+# between chunks, so memory is O(chunk) whatever n is. Histogram below, blocks.BlockCounter
+# (transition counts) and seqfile.SequenceWriter consume the chunks one by one.
+
+CHUNK = 1 << 16 # default number of time steps per chunk
+
+class OrbitStream: # chunks of the orbit(s) x0, f(x0), ..., f^(n-1)(x0)
+    def __init__(self, step, x0, n, chunk=CHUNK):
+        self.step = step # map object (scalar x0) or vectorized step function (array of states)
+        self.state = x0 # next state to be yielded; f^n(x0) once the stream is exhausted
+        self.remaining = n
+        self.chunk = chunk
+        self.pos = 0 # time index of the first point of the next chunk
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.remaining <= 0:
+            raise StopIteration
+        m = min(self.chunk, self.remaining)
+        with stage('orbit', m * max(1, np.size(self.state))):
+            if hasattr(self.step, 'iterate') and np.ndim(self.state) == 0:
+                seq = self.step.iterate(self.state, m)
+                self.state = self.step.step(float(seq[-1]))
+            else:
+                f = getattr(self.step, 'step_array', self.step)
+                seq = iterate_grid(f, self.state, m)
+                self.state = f(seq[..., -1])
+        self.remaining -= m
+        self.pos += m
+        return seq
+
+def bernouli_stream(ivs, c_params, l, chunk=CHUNK): # chunks of shape (len(c_params), len(ivs), m)
+    return OrbitStream(*bernouli_setup(ivs, c_params), l, chunk)
+
+def logistic_stream(ivs, l, chunk=CHUNK): # chunks of shape (len(ivs), m)
+    return OrbitStream(*logistic_setup(ivs), l, chunk)
+
+def plm3_stream(ivs, p_list, l, chunk=CHUNK): # chunks of shape (len(p_list), len(ivs), m)
+    return OrbitStream(*plm3_setup(ivs, p_list), l, chunk)
+
+def bit_chunks(states, t): # thresholded chunks (0 if x < t else 1)
+    for x in states:
+        yield threshold_grid(x, t)
+
+class Histogram: # fixed-bin histogram over the last axis, accumulated chunk by chunk
+    def __init__(self, bins=100, range=(0, 1), shape=()):
+        self.edges = np.linspace(range[0], range[1], bins + 1)
+        self.counts = np.zeros(tuple(shape) + (bins,), dtype=np.int64)
+
+    def add(self, x):
+        for idx in np.ndindex(self.counts.shape[:-1]):
+            self.counts[idx] += np.histogram(x[idx], bins=self.edges)[0]
+
+    def density(self): # normalized like plt.hist(..., density=True)
+        total = self.counts.sum(axis=-1, keepdims=True)
+        return self.counts / (total * np.diff(self.edges))
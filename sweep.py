@@ -0,0 +1,57 @@
+import numpy as np
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+import instrument
+
+# Parameter sweeps over a process pool
+# a sweep is a list of parameter points (dicts) and a task called as task(**point); the task must be a
+# module-level function (or functools.partial of one) so it can be sent to the workers.
+# results come back in the order of the points, and every random state is derived from the
+# point index, never from the worker, so the table is the same for any number of workers.
+# with instrumentation enabled (instrument.py) every point is measured on its own and the
+# records travel back from the workers with the results.
+
+WORKERS = None # default number of processes, None = os.cpu_count(); 1 runs in this process
+
+def grid(**axes): # cartesian product of the axes, the last axis varies fastest
+    names = list(axes)
+    return [dict(zip(names, values)) for values in product(*axes.values())]
+
+def point_seeds(seed, n): # independent, reproducible seeds for n points
+    return [int(s.generate_state(1, dtype=np.uint64)[0]) for s in np.random.SeedSequence(seed).spawn(n)]
+
+def _call(task, point):
+    if not instrument.ENABLED:
+        return task(**point)
+    with instrument.point(**{k: v for k, v in point.items() if k != 'seed'}):
+        result = task(**point)
+    return result, instrument.collect()
+
+def _results(outputs): # results of _call, records merged into this process
+    if not instrument.ENABLED:
+        return outputs
+    for result, records in outputs:
+        instrument.merge(records)
+    return [result for result, records in outputs]
+
+def run_sweep(task, points, workers=None, chunksize=1, seed=None): # [task(**point) for point in points], in parallel
+    points = [dict(point) for point in points]
+    if seed is not None: # each point gets its own 'seed' argument
+        for point, s in zip(points, point_seeds(seed, len(points))):
+            point['seed'] = s
+    workers = WORKERS if workers is None else workers
+    workers = os.cpu_count() if workers is None else workers
+    workers = max(1, min(workers, len(points)))
+    if workers == 1:
+        return _results([_call(task, point) for point in points])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return _results(list(pool.map(_call, [task] * len(points), points, chunksize=chunksize)))
+
+def table(points, results): # one row per point: parameters followed by the task's result
+    rows = []
+    for point, result in zip(points, results):
+        row = dict(point)
+        row.update(result if isinstance(result, dict) else {'result': result})
+        rows.append(row)
+    return rows
@@ -0,0 +1,168 @@
+import argparse
+import sys
+from fractions import Fraction
+import numpy as np
+import kernels
+from kernels import njit
+from seqfile import encode_header, make_header
+from sweep import run_sweep
+
+# Exact symbolic sequences of the skew Bernoulli map
+# with t = c the bits are the itinerary of x0 (0 while x < c). in float64 the orbit loses one
+# mantissa bit per step at c = 0.5 and is 0 after ~55 steps, which is why hamming.py uses 0.49999.
+# here c = a/b and x0 = p/q are exact fractions and the state is the integer r_n = p b^n mod q:
+#   x_n = r_n / q of the map x -> b x mod 1, bit n = [b r_n >= a q] (the base-b digit of x_n is >= a),
+#   r_(n+1) = b r_n mod q
+# for c = 1/2 this is the skew Bernoulli (doubling) map itself and the bits are the binary digits of x0.
+# for other c it is the b-adic map read through the partition [0, c), [c, 1): its bits have exactly
+# the law of the skew map itinerary (independent, P(0) = c, since the base-b digits of a uniform x0
+# are independent and uniform) and are the itinerary of one well-defined point of the skew map, but
+# not of x0 itself; exact_itinerary() iterates the skew map in rationals, as a (slow) reference.
+# so only c = 1/2 files are labeled skew_bernoulli with iv x0; other c are labeled b_adic (params c, b)
+# and have no iv, and the readers (cache, scan.py, entropyrate.py) don't take them for an orbit of x0.
+# r_n = p b^n mod q is one modular power, so any position is reached at once: sequences are made in
+# LANES independent lanes (compiled with numba when it is installed, several digits per division)
+# and long files are written by sweep workers, each its own range.
+# with q prime and b a primitive root mod q the period is q - 1 bits. the default Q is a safe prime
+# with Q = 3 mod 8, so 2 is a primitive root; b * q must stay below 2^63.
+
+Q = 1125899906840747 # safe prime near 2^50
+X0 = Fraction(200704268473320, Q) # ~ 0.1782612, the initial value of hamming.py
+LANES = 1 << 14
+PIECE = 1 << 26 # bits per worker task when writing files
+
+def fraction(v): # exact fraction of a number or a string such as '1/2', '0.3' (floats through their decimal repr)
+    return Fraction(str(v)) if isinstance(v, float) else Fraction(v)
+
+class ExactSource: # bits[start:stop] of the exact symbolic sequence of (c, x0)
+    def __init__(self, c=Fraction(1, 2), x0=X0):
+        self.c, self.x0 = fraction(c), fraction(x0)
+        if not 0 < self.c < 1 or not 0 <= self.x0 < 1:
+            raise ValueError(f'need 0 < c < 1 and 0 <= x0 < 1, not c={self.c}, x0={self.x0}')
+        self.a, self.b = self.c.numerator, self.c.denominator
+        self.p, self.q = self.x0.numerator, self.x0.denominator
+        if self.b * self.q >= 2**63:
+            raise ValueError(f'b * q = {self.b * self.q} does not fit 63 bits, use an x0 with a smaller denominator')
+
+    def remainder(self, n): # r_n, the state after n steps
+        return self.p * pow(self.b, n, self.q) % self.q
+
+    def digits_per_step(self): # m base-b digits at a time, the largest m with b^m q < 2^63
+        m = 1
+        while self.b ** (m + 1) * self.q < 2**63:
+            m += 1
+        return m
+
+    def bits(self, start, stop): # uint8 array, lane i makes bits start + i*L .. start + (i+1)*L
+        n = stop - start
+        if n <= 0:
+            return np.zeros(0, dtype=np.uint8)
+        m = self.digits_per_step()
+        lanes = min(LANES, -(-n // m))
+        steps = -(-n // (lanes * m))
+        L = steps * m
+        r = np.array([self.remainder(start + i * L) for i in range(lanes)], dtype=np.int64)
+        if kernels.ENABLED:
+            out = np.empty((lanes, L), dtype=np.uint8)
+            _lane_bits(r, self.q, self.b, self.a, m, out)
+            return out.ravel()[:n]
+        D = np.empty((lanes, steps), dtype=np.int64) # m digits of x_n at a time: D = floor(b^m r / q)
+        B = self.b ** m
+        for j in range(steps):
+            r *= B
+            np.floor_divide(r, self.q, out=D[:, j])
+            r -= D[:, j] * self.q
+        powers = self.b ** np.arange(m - 1, -1, -1, dtype=np.int64)
+        digits = D[:, :, None] // powers % self.b
+        return (digits >= self.a).astype(np.uint8).ravel()[:n]
+
+    def packed(self, start, stop): # big-endian packed bits, start a multiple of 8
+        return np.packbits(self.bits(start, stop))
+
+    def header(self): # map and parameters for a sequence file (exact values as strings)
+        if self.c == Fraction(1, 2): # the skew Bernoulli itinerary of x0
+            return {'map': 'skew_bernoulli', 'params': {'c': 0.5, 't': 0.5, 'c_exact': '1/2', 'x0_exact': str(self.x0)},
+                    'iv': float(self.x0)}
+        return {'map': 'b_adic', 'params': {'c': float(self.c), 'b': self.b, 'c_exact': str(self.c), 'x0_exact': str(self.x0)},
+                'iv': None}
+
+@njit(cache=True)
+def _lane_bits(r, q, b, a, m, out): # compiled ExactSource.bits: row i continues from r[i]
+    B = b ** m
+    for i in range(out.shape[0]):
+        x = r[i]
+        for j in range(0, out.shape[1], m):
+            x *= B
+            D = x // q
+            x -= D * q
+            if b == 2:
+                for k in range(m):
+                    out[i, j + k] = (D >> (m - 1 - k)) & 1
+            else:
+                for k in range(m - 1, -1, -1):
+                    out[i, j + k] = D % b >= a
+                    D //= b
+
+def exact_itinerary(c, x0, n): # itinerary of the skew Bernoulli map in rational arithmetic (reference, slow)
+    c, x = fraction(c), fraction(x0)
+    out = np.empty(n, dtype=np.uint8)
+    for i in range(n):
+        if x < c:
+            out[i] = 0
+            x = x / c
+        else:
+            out[i] = 1
+            x = (x - c) / (1 - c)
+    return out
+
+def reference_bits(c, x0, n): # bits of the b-adic map in rational arithmetic (reference for ExactSource)
+    c, x = fraction(c), fraction(x0)
+    out = np.empty(n, dtype=np.uint8)
+    for i in range(n):
+        x = c.denominator * x
+        digit = int(x)
+        out[i] = digit >= c.numerator
+        x -= digit
+    return out
+
+def _write_piece(path, offset, c, x0, start, stop): # one range of a file written by write_exact
+    packed = ExactSource(c, x0).packed(start, stop)
+    data = np.memmap(path, dtype=np.uint8, mode='r+', offset=offset + start // 8, shape=(len(packed),))
+    data[:] = packed
+    data.flush()
+    return stop - start
+
+def write_exact(path, n, c=Fraction(1, 2), x0=X0, workers=None, piece=PIECE): # exact sequence file of n bits, written in parallel
+    source = ExactSource(c, x0)
+    h = source.header()
+    prefix = encode_header(make_header(n, h['map'], h['params'], h['iv']))
+    with open(path, 'wb') as f:
+        f.write(prefix)
+        f.truncate(len(prefix) + (n + 7) // 8)
+    piece = max(8, piece - piece % 8) # pieces start on byte boundaries
+    points = [{'path': path, 'offset': len(prefix), 'c': str(source.c), 'x0': str(source.x0), 'start': start, 'stop': min(start + piece, n)}
+              for start in range(0, n, piece)]
+    run_sweep(_write_piece, points, workers)
+    return path
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description='exact skew Bernoulli bit sequence (c and x0 as fractions; c != 1/2 gives b-adic bits with the same law)')
+    p.add_argument('path')
+    p.add_argument('-n', type=int, default=1000000)
+    p.add_argument('--c', default='1/2')
+    p.add_argument('--x0', default=str(X0))
+    p.add_argument('--workers', type=int, default=None)
+    p.add_argument('--check', type=int, default=0, help='compare the first CHECK bits with the rational reference')
+    args = p.parse_args(argv)
+    write_exact(args.path, args.n, args.c, args.x0, args.workers)
+    print(f'{args.path}: {args.n} bits, c = {args.c}, x0 = {args.x0}')
+    if args.check:
+        from seqfile import PackedSequence
+        bits = PackedSequence(args.path).bits(0, args.check)
+        ok = np.array_equal(bits, reference_bits(args.c, args.x0, len(bits)))
+        print(f'first {len(bits)} bits equal to the rational reference: {ok}')
+        return 0 if ok else 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
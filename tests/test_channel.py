@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from channel import MemorylessErrors, MarkovErrors, transition_statistics
+
+# the chaotic and random backends of an error model share their transition statistics
+
+N = 1 << 20
+TOL = 0.01
+PIECES = [1, 7, 1000, 65536, 300001] # uneven bits() calls, continued across calls
+
+def chunked(model, n):
+    out, total = [], 0
+    while total < n:
+        for m in PIECES:
+            m = min(m, n - total)
+            out.append(model.bits(m))
+            total += m
+    return np.concatenate(out)
+
+MODELS = [
+    lambda backend: MemorylessErrors(0.1, backend, seed=1),
+    lambda backend: MemorylessErrors(0.35, backend, seed=2),
+    lambda backend: MarkovErrors(0.05, 0.3, backend, seed=3),
+    lambda backend: MarkovErrors(0.2, 0.45, backend, seed=4),
+]
+
+@pytest.mark.parametrize('model', MODELS)
+@pytest.mark.parametrize('chunks', [False, True])
+def test_backends_share_statistics(model, chunks):
+    stats = {}
+    for backend in ('chaotic', 'random'):
+        m = model(backend)
+        bits = chunked(m, N) if chunks else m.bits(N)
+        assert len(bits) == N and set(np.unique(bits)) <= {0, 1}
+        stats[backend] = transition_statistics(bits)
+    p01, p10 = model('random').transition_probabilities()
+    expected = (model('random').stationary(), p01, p10)
+    for backend in stats:
+        assert np.allclose(stats[backend], expected, atol=TOL), (backend, stats[backend], expected)
+    assert np.allclose(stats['chaotic'], stats['random'], atol=TOL)
+
+@pytest.mark.parametrize('model', MODELS)
+def test_chaotic_chunks_continue_the_sequence(model):
+    assert np.array_equal(chunked(model('chaotic'), N), model('chaotic').bits(N))
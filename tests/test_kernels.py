@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+import kernels
+from maps import SkewBernoulliMap, LogisticMap, PLM3Map
+
+# the compiled and the pure-Python backends give bit-identical orbits and counters
+
+N = 200000
+CASES = [
+    (SkewBernoulliMap(0.3), 0.752352, 0.3),
+    (SkewBernoulliMap(0.49999), 0.1782612, 0.49999),
+    (LogisticMap(), 0.3, 0.5),
+    (PLM3Map(0.1, 0.3), 0.51262323, None),
+    (PLM3Map(0.8, 0.9), 0.51262323, None),
+]
+
+needs_numba = pytest.mark.skipif(not kernels.HAVE_NUMBA, reason='numba is not installed')
+
+def both(monkeypatch, f): # f() with the kernels, then with the pure-Python code
+    monkeypatch.setattr(kernels, 'ENABLED', True)
+    jit = f()
+    monkeypatch.setattr(kernels, 'ENABLED', False)
+    return jit, f()
+
+@needs_numba
+@pytest.mark.parametrize('m, x0, t', CASES)
+def test_iterate(monkeypatch, m, x0, t):
+    jit, py = both(monkeypatch, lambda: m.iterate(x0, N))
+    assert np.array_equal(jit, py, equal_nan=True)
+
+@needs_numba
+@pytest.mark.parametrize('m, x0, t', CASES)
+def test_orbit_pair_counts(monkeypatch, m, x0, t):
+    t = m.t if t is None else t
+    (jit_counts, jit_state), (py_counts, py_state) = both(monkeypatch, lambda: kernels.orbit_pair_counts(m, x0, N, t))
+    assert np.array_equal(jit_counts, py_counts)
+    assert jit_state == py_state or (np.isnan(jit_state) and np.isnan(py_state))
+
+def test_no_jit_environment():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = 'import kernels; print(kernels.ENABLED)'
+    out = subprocess.run([sys.executable, '-c', code], cwd=root, env=dict(os.environ, NO_JIT='1'),
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip() == 'False'
@@ -0,0 +1,43 @@
+import numpy as np
+from maps import PLM3Map, skew_bernouli_step, logistic_step, plm3_step
+
+# Batched trajectory engine
+# every (parameter, initial value) orbit of a sweep is stored as one column and
+# advanced in lockstep, so a single numpy operation performs one time step for all of them.
+# the vectorized steps use exactly the same float64 arithmetic as the scalar maps,
+# so each orbit is bit-identical to iterating the scalar function from the same initial value.
+
+def threshold_grid(x, t): # vectorized threshold function (0 if x < t else 1)
+    return np.where(x < t, 0, 1).astype(np.uint8)
+
+def iterate_grid(step, x0, l): # iterate step l-1 times from the array of initial states x0
+    x0 = np.asarray(x0, dtype=float)
+    x = np.empty((l,) + x0.shape) # time-major, so every step writes one contiguous row
+    x[0] = x0
+    for i in range(1, l):
+        x[i] = step(x[i - 1])
+    return np.moveaxis(x, 0, -1) # orbit of x0[j] is x[j, :]
+
+def bernouli_setup(ivs, c_params): # (vectorized step, initial states) of the grid c_params x ivs
+    c = np.asarray(c_params, dtype=float)[:, None]
+    x0 = np.broadcast_to(np.asarray(ivs, dtype=float), (len(c_params), len(ivs)))
+    return (lambda x: skew_bernouli_step(x, c)), x0
+
+def logistic_setup(ivs):
+    return logistic_step, np.asarray(ivs, dtype=float)
+
+def plm3_setup(ivs, p_list): # (vectorized step, initial states) of the grid p_list x ivs
+    params = np.array([PLM3Map(p_1, p_2).parameters() for p_1, p_2 in p_list], dtype=float)
+    t, a, a_positive, c1, c2, a1, a2 = (params[:, j][:, None] for j in range(7))
+    a_positive = a_positive.astype(bool)
+    x0 = np.broadcast_to(np.asarray(ivs, dtype=float), (len(p_list), len(ivs)))
+    return (lambda x: plm3_step(x, a, a_positive, c1, c2, a1, a2)), x0
+
+def bernouli_grid(ivs, c_params, l): # result[k, idx] = orbit of ivs[idx] with c = c_params[k]
+    return iterate_grid(*bernouli_setup(ivs, c_params), l)
+
+def logistic_grid(ivs, l): # result[idx] = orbit of ivs[idx]
+    return iterate_grid(*logistic_setup(ivs), l)
+
+def plm3_grid(ivs, p_list, l): # result[k, idx] = orbit of ivs[idx] with (p1, p2) = p_list[k]
+    return iterate_grid(*plm3_setup(ivs, p_list), l)